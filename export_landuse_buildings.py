@@ -2,15 +2,44 @@
 # Baixa usos do solo e edificações para:
 # - City of Vancouver
 # - City of North Vancouver
-# usando OSMnx e salva SOMENTE como CSV (com geometria em WKT).
+# usando OSMnx e salva como CSV (com geometria em WKT) e GeoParquet.
+#
+# Com --geometry-encoding wkb-hex|wkb-base64, a geometria do CSV sai em WKB
+# (mais rápido de gravar e de ler que WKT); --precision limita as casas
+# decimais das coordenadas.
+#
+# Antes de gravar, as coordenadas são ajustadas a uma grade de --grid graus
+# (padrão 1e-6, ~0,1 m; 0 desativa).
+#
+# Com --offline, reconstrói as mesmas camadas direto das respostas
+# Overpass/Nominatim já guardadas em ./cache, sem rede e sem OSMnx.
 
 # Requisitos:
-# pip install osmnx geopandas pandas shapely
+# pip install osmnx geopandas pandas shapely pyarrow
+# (e landuse_common.py, no mesmo diretório)
 
 import os
+import json
+import base64
+import time
+import argparse
+import threading
+from array import array
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from glob import glob
+import numpy as np
 import pandas as pd
 import geopandas as gpd
-import osmnx as ox
+import shapely
+from shapely.geometry import LineString, shape
+from shapely.ops import polygonize, unary_union
+
+from landuse_common import first_seen, merge_geoparquet, quantize, to_geoparquet
+
+try:  # não é necessário no modo --offline
+    import osmnx as ox
+except ImportError:
+    ox = None
 
 CITIES = [
     "Vancouver, British Columbia, Canada",
@@ -20,6 +49,34 @@ CITIES = [
 OUT_DIR = "data"
 os.makedirs(OUT_DIR, exist_ok=True)
 
+# Cache do OSMnx (respostas Overpass/Nominatim em JSON)
+CACHE_DIR = "cache"
+
+# Camadas exportadas: uma consulta por cidade traz as duas tags, que são
+# separadas localmente (split_layers)
+LAYER_TAGS = ("landuse", "building")
+
+# Requisições concorrentes (modo online). A instância pública do Overpass
+# oferece poucos slots por IP; o Nominatim pede no máximo 1 requisição/s.
+OVERPASS_SLOTS = 2
+OVERPASS_MIN_INTERVAL = 1.0   # s entre inícios de consultas Overpass
+NOMINATIM_MIN_INTERVAL = 1.0  # s entre geocodificações
+
+# Identificação OSM gravada em cada camada; usada para descartar feições
+# repetidas (ex.: na divisa entre cidades) ao montar a camada combinada
+OSM_ID = ["element", "id"]
+CSV_CHUNK_ROWS = 50_000  # linhas por bloco ao juntar os CSVs das cidades
+
+# Geometria no CSV: "wkt" (legível), "wkb-hex" ou "wkb-base64"; casas
+# decimais das coordenadas (WKT usa 6 por padrão, WKB grava sem arredondar)
+GEOMETRY_ENCODINGS = ("wkt", "wkb-hex", "wkb-base64")
+GEOMETRY_ENCODING = "wkt"
+CSV_PRECISION = None
+
+# Grade das coordenadas (graus, EPSG:4326) aplicada antes de exportar;
+# 1e-6 grau ~ 0,1 m. 0 desativa.
+QUANTIZE_GRID = 1e-6
+
 
 def slugify(text: str) -> str:
     return (
@@ -37,68 +94,575 @@ def fetch_boundary(place):
     return gdf.geometry.values[0]
 
 
-def to_csv_with_wkt(gdf: gpd.GeoDataFrame, csv_path: str):
-    """Converte geometria para WKT e salva CSV."""
+class RateLimiter:
+    """
+    Limita requisições concorrentes (no máximo `slots` ao mesmo tempo) e o
+    intervalo mínimo entre inícios consecutivos. Uso: `with limiter: ...`.
+    """
+
+    def __init__(self, slots: int, min_interval: float):
+        self._slots = threading.BoundedSemaphore(slots)
+        self._lock = threading.Lock()
+        self._min_interval = min_interval
+        self._next_start = 0.0
+
+    def __enter__(self):
+        self._slots.acquire()
+        with self._lock:
+            wait = self._next_start - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+            self._next_start = time.monotonic() + self._min_interval
+        return self
+
+    def __exit__(self, *exc):
+        self._slots.release()
+
+
+def fetch_all(cities, slots: int = OVERPASS_SLOTS):
+    """
+    Busca limites e feições (landuse e building) de todas as cidades em
+    paralelo: as geocodificações passam por um limitador do Nominatim e as
+    consultas de feições, por um limitador do Overpass com `slots`
+    simultâneos. Cada cidade faz uma única consulta combinada, pedida assim
+    que o seu limite chega. Gera (cidade, (landuse, buildings)) à medida que
+    cada cidade termina; o chamador exporta e descarta uma antes da próxima.
+    """
+    nominatim = RateLimiter(1, NOMINATIM_MIN_INTERVAL)
+    overpass = RateLimiter(slots, OVERPASS_MIN_INTERVAL)
+
+    def boundary(city):
+        with nominatim:
+            return fetch_boundary(city)
+
+    def features(geom):
+        with overpass:
+            return split_layers(get_features(geom, LAYER_TAGS))
+
+    with ThreadPoolExecutor(max_workers=max(len(cities), 1) * 2) as pool:
+        bounds = {pool.submit(boundary, city): city for city in cities}
+        pending = {}
+        for fut in as_completed(bounds):
+            pending[pool.submit(features, fut.result())] = bounds[fut]
+        for fut in as_completed(pending):
+            yield pending.pop(fut), tuple(fut.result())
+
+
+def iter_overpass_elements(path: str, chunk_size: int = 1 << 20):
+    """
+    Itera os elementos de uma resposta Overpass (JSON do cache) lendo o
+    arquivo em blocos: cada elemento do array "elements" é decodificado
+    isoladamente, sem carregar o documento inteiro na memória.
+    """
+    decoder = json.JSONDecoder()
+    with open(path, encoding="utf-8") as f:
+        # avança até o "[" do array "elements"
+        buf = ""
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                return
+            buf += chunk
+            start = buf.find('"elements"')
+            if start < 0:
+                buf = buf[-len('"elements"'):]
+                continue
+            bracket = buf.find("[", start)
+            if bracket >= 0:
+                buf, pos = buf[bracket + 1:], 0
+                break
+
+        while True:
+            # pula separadores, lendo mais se o bloco acabar
+            while pos < len(buf) and buf[pos] in " \t\r\n,":
+                pos += 1
+            if pos == len(buf):
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    return
+                buf, pos = chunk, 0
+                continue
+            if buf[pos] == "]":
+                return
+            try:
+                element, pos = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                # elemento cortado no fim do bloco: junta o próximo bloco
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    raise
+                buf, pos = buf[pos:] + chunk, 0
+                continue
+            yield element
+            if pos > chunk_size:
+                buf, pos = buf[pos:], 0
+
+
+class OverpassElements:
+    """
+    Nós, vias e relações de respostas Overpass em arrays compactos:
+    ids/coordenadas de nós em array("q")/array("d"), referências de vias
+    achatadas em um único array com offsets. Tags só para elementos que
+    as têm.
+    """
+
+    def __init__(self):
+        self.node_ids = array("q")
+        self.node_lon = array("d")
+        self.node_lat = array("d")
+        self.way_ids = array("q")
+        self.way_offsets = array("q", [0])  # refs da via i: way_refs[off[i]:off[i+1]]
+        self.way_refs = array("q")
+        self.relations = {}  # id -> [(tipo, ref, papel), ...]
+        self.tags = {}       # (tipo, id) -> {tag: valor}
+        self._seen_ways = set()
+
+    def add(self, el: dict):
+        kind, osmid = el["type"], el["id"]
+        if kind == "node":
+            self.node_ids.append(osmid)
+            self.node_lon.append(el["lon"])
+            self.node_lat.append(el["lat"])
+        elif kind == "way":
+            if osmid in self._seen_ways:
+                return
+            self._seen_ways.add(osmid)
+            self.way_ids.append(osmid)
+            self.way_refs.extend(el.get("nodes", ()))
+            self.way_offsets.append(len(self.way_refs))
+        elif kind == "relation":
+            if osmid in self.relations:
+                return
+            self.relations[osmid] = [(m["type"], m["ref"], m.get("role", ""))
+                                     for m in el.get("members", ())]
+        else:
+            return
+        if el.get("tags"):
+            self.tags[(kind, osmid)] = el["tags"]
+
+    def way_nodes(self, i: int) -> array:
+        return self.way_refs[self.way_offsets[i]:self.way_offsets[i + 1]]
+
+    @classmethod
+    def from_cache(cls, paths):
+        """Lê (em streaming) um ou mais arquivos de resposta Overpass do cache."""
+        data = cls()
+        for path in paths:
+            for el in iter_overpass_elements(path):
+                data.add(el)
+        return data
+
+    def __str__(self):
+        return (f"{len(self.node_ids)} nós | {len(self.way_ids)} vias | "
+                f"{len(self.relations)} relações | {len(self.tags)} com tags")
+
+
+def _cache_files(kind: str, cache_dir: str = CACHE_DIR) -> list:
+    """
+    Arquivos JSON do cache por tipo: "overpass" (objeto com "elements") ou
+    "nominatim" (lista de resultados). Só o primeiro caractere é lido.
+    """
+    first = "{" if kind == "overpass" else "["
+    out = []
+    for path in sorted(glob(os.path.join(cache_dir, "*.json"))):
+        with open(path, encoding="utf-8") as f:
+            if f.read(1) == first:
+                out.append(path)
+    return out
+
+
+def load_cached_boundary(place: str, cache_dir: str = CACHE_DIR):
+    """
+    Limite de `place` a partir das respostas Nominatim do cache. Como o nome
+    do arquivo é um hash da URL, cada resposta é associada ao lugar pelo
+    nome do primeiro resultado poligonal (o mesmo que o OSMnx usa): vale o
+    nome mais longo contido no primeiro trecho de `place`.
+    """
+    print(f"[boundary] {place} (cache)")
+    key = place.split(",")[0].strip().lower()
+    best_name, best_geom = "", None
+    for path in _cache_files("nominatim", cache_dir):
+        with open(path, encoding="utf-8") as f:
+            results = json.load(f)
+        for res in results:
+            geojson = res.get("geojson") or {}
+            if geojson.get("type") not in ("Polygon", "MultiPolygon"):
+                continue
+            name = (res.get("name") or "").lower()
+            if name and name in key and len(name) > len(best_name):
+                best_name, best_geom = name, shape(geojson)
+            break
+    if best_geom is None:
+        raise FileNotFoundError(f"limite de {place!r} não encontrado em {cache_dir}")
+    return best_geom
+
+
+def load_cached_elements(cache_dir: str = CACHE_DIR) -> OverpassElements:
+    """Todos os elementos das respostas Overpass do cache (em streaming)."""
+    data = OverpassElements.from_cache(_cache_files("overpass", cache_dir))
+    print(f"[cache] {data}")
+    return data
+
+
+def node_index_fingerprint(data: OverpassElements, cache_dir: str = CACHE_DIR) -> dict:
+    """Nome, tamanho e mtime de cada cache/*.json, mais o total de nós lidos."""
+    sources = []
+    for path in sorted(glob(os.path.join(cache_dir, "*.json"))):
+        st = os.stat(path)
+        sources.append([os.path.basename(path), st.st_size, st.st_mtime_ns])
+    return {"sources": sources, "nodes": len(data.node_ids)}
+
+
+class NodeIndex:
+    """
+    Índice compacto de coordenadas de nós: ids int64 ordenados e um array
+    (n, 2) float64 de lon/lat, com busca vetorizada por np.searchsorted.
+    save()/load() gravam os dois arrays em .npy; load(mmap=True) mapeia os
+    arquivos em memória, então vários processos/cidades compartilham as
+    mesmas páginas. save() grava também uma impressão digital das fontes
+    (fingerprint.json); is_fresh() a compara para decidir se dá para reusar.
+    """
+
+    def __init__(self, ids: np.ndarray, coords: np.ndarray):
+        self.ids = ids
+        self.coords = coords
+
+    @classmethod
+    def from_elements(cls, data: OverpassElements) -> "NodeIndex":
+        ids = np.frombuffer(data.node_ids, dtype=np.int64)
+        order = np.argsort(ids, kind="stable")
+        ids = ids[order]
+        first = np.ones(len(ids), dtype=bool)  # nós repetidos entre respostas
+        first[1:] = ids[1:] != ids[:-1]
+        order = order[first]
+        coords = np.column_stack([np.frombuffer(data.node_lon, dtype=np.float64)[order],
+                                  np.frombuffer(data.node_lat, dtype=np.float64)[order]])
+        return cls(ids[first], coords)
+
+    def lookup(self, refs) -> tuple:
+        """(coords (n, 2), encontrado (n,)) para um array de ids; ausentes ficam NaN."""
+        refs = np.asarray(refs, dtype=np.int64)
+        pos = np.searchsorted(self.ids, refs)
+        pos[pos == len(self.ids)] = 0
+        found = self.ids[pos] == refs if len(self.ids) else np.zeros(len(refs), dtype=bool)
+        coords = self.coords[pos] if len(self.ids) else np.empty((len(refs), 2))
+        coords[~found] = np.nan
+        return coords, found
+
+    def save(self, path: str, fingerprint: dict = None):
+        os.makedirs(path, exist_ok=True)
+        meta = os.path.join(path, "fingerprint.json")
+        if os.path.exists(meta):
+            os.remove(meta)  # só volta a existir com os arrays completos
+        np.save(os.path.join(path, "ids.npy"), self.ids)
+        np.save(os.path.join(path, "coords.npy"), self.coords)
+        if fingerprint is not None:
+            with open(meta, "w", encoding="utf-8") as f:
+                json.dump(fingerprint, f)
+
+    @staticmethod
+    def is_fresh(path: str, fingerprint: dict) -> bool:
+        """True se o índice gravado em `path` veio das mesmas fontes."""
+        try:
+            with open(os.path.join(path, "fingerprint.json"), encoding="utf-8") as f:
+                return json.load(f) == fingerprint
+        except (OSError, ValueError):
+            return False
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True) -> "NodeIndex":
+        mode = "r" if mmap else None
+        return cls(np.load(os.path.join(path, "ids.npy"), mmap_mode=mode),
+                   np.load(os.path.join(path, "coords.npy"), mmap_mode=mode))
+
+    def __len__(self):
+        return len(self.ids)
+
+
+class _WayCoords:
+    """Coordenadas de todas as vias resolvidas de uma vez pelo NodeIndex."""
+
+    def __init__(self, data: OverpassElements, nodes: NodeIndex):
+        self.offsets = np.frombuffer(data.way_offsets, dtype=np.int64)
+        refs = np.frombuffer(data.way_refs, dtype=np.int64)
+        self.xy, found = nodes.lookup(refs)
+        missing = np.concatenate([[0], np.cumsum(~found)])
+        self.lengths = np.diff(self.offsets)
+        self.complete = (missing[self.offsets[1:]] - missing[self.offsets[:-1]]) == 0
+        last = np.maximum(self.offsets[1:] - 1, 0)
+        self.closed = (self.lengths >= 4) & (refs[np.minimum(self.offsets[:-1], last)] == refs[last])
+        self.pos = {way_id: i for i, way_id in enumerate(data.way_ids)}
+
+    def line(self, way_id: int):
+        i = self.pos.get(way_id)
+        if i is None or not self.complete[i] or self.lengths[i] < 2:
+            return None
+        return LineString(self.xy[self.offsets[i]:self.offsets[i + 1]])
+
+    def build(self, ways: np.ndarray, polygon: bool) -> np.ndarray:
+        """Polygons (ou LineStrings) das vias `ways` (posições), vetorizado."""
+        if not len(ways):
+            return np.empty(0, dtype=object)
+        lengths = self.lengths[ways]
+        starts = np.repeat(self.offsets[ways] - np.cumsum(lengths) + lengths, lengths)
+        xy = self.xy[starts + np.arange(lengths.sum())]
+        parts = np.repeat(np.arange(len(ways)), lengths)
+        if polygon:
+            return shapely.polygons(shapely.linearrings(xy, indices=parts))
+        return shapely.linestrings(xy, indices=parts)
+
+
+def _relation_geometry(ways: _WayCoords, members: list):
+    """(Multi)Polygon de uma relação multipolygon: anéis outer menos anéis inner."""
+    outer, inner = [], []
+    for kind, ref, role in members:
+        if kind != "way":
+            continue
+        line = ways.line(ref)
+        if line is not None:
+            (inner if role == "inner" else outer).append(line)
+    shells = list(polygonize(outer))
+    if not shells:
+        return None
+    geom = unary_union(shells)
+    holes = list(polygonize(inner))
+    return geom.difference(unary_union(holes)) if holes else geom
+
+
+def features_from_elements(data: OverpassElements, tag, polygon=None,
+                           nodes: NodeIndex = None) -> gpd.GeoDataFrame:
+    """
+    Feições com a tag `tag` (ou com qualquer uma de uma lista de tags) no
+    formato do OSMnx (índice (element, id), uma coluna por tag): nós ->
+    Point, vias fechadas -> Polygon (abertas -> LineString), relações
+    multipolygon -> (Multi)Polygon. Com `polygon`, mantém só as que o
+    intersectam, como ox.features_from_polygon.
+    Passe o mesmo `nodes` (NodeIndex) para reaproveitá-lo entre chamadas.
+    """
+    if nodes is None:
+        nodes = NodeIndex.from_elements(data)
+    ways = _WayCoords(data, nodes)
+
+    wanted = (tag,) if isinstance(tag, str) else tuple(tag)
+    keys = [key for key, tags in data.tags.items() if any(t in tags for t in wanted)]
+    geoms = np.full(len(keys), None, dtype=object)
+    node_rows, node_ids, way_rows, way_idx = [], [], [], []
+    for row, (kind, osmid) in enumerate(keys):
+        if kind == "node":
+            node_rows.append(row)
+            node_ids.append(osmid)
+        elif kind == "way":
+            i = ways.pos[osmid]
+            if ways.complete[i] and ways.lengths[i] >= 2:
+                way_rows.append(row)
+                way_idx.append(i)
+        elif data.tags[(kind, osmid)].get("type") == "multipolygon":
+            geoms[row] = _relation_geometry(ways, data.relations[osmid])
+
+    if node_rows:
+        xy, found = nodes.lookup(node_ids)
+        rows = np.asarray(node_rows)[found]
+        geoms[rows] = shapely.points(xy[found])
+    if way_rows:
+        way_rows, way_idx = np.asarray(way_rows), np.asarray(way_idx)
+        not_area = np.array([data.tags[keys[r]].get("area") == "no" for r in way_rows], dtype=bool)
+        as_poly = ways.closed[way_idx] & ~not_area
+        geoms[way_rows[as_poly]] = ways.build(way_idx[as_poly], polygon=True)
+        geoms[way_rows[~as_poly]] = ways.build(way_idx[~as_poly], polygon=False)
+
+    keep = np.array([g is not None and not g.is_empty for g in geoms], dtype=bool)
+    keys = [k for k, ok in zip(keys, keep) if ok]
+    # dtype=object: tags como texto do OSM, sem conversão coluna a coluna
+    gdf = gpd.GeoDataFrame(pd.DataFrame([data.tags[k] for k in keys], dtype=object,
+                                        index=pd.MultiIndex.from_tuples(keys, names=["element", "id"])),
+                           geometry=list(geoms[keep]), crs=4326)
+    if polygon is not None:
+        gdf = gdf[gdf.intersects(polygon)]
+    return gdf
+
+
+def get_features(geom, tag, cached: OverpassElements = None,
+                 nodes: NodeIndex = None) -> gpd.GeoDataFrame:
+    """
+    Feições com `tag` (ou qualquer tag de uma lista) dentro de geom: do
+    cache (offline) ou via OSMnx, numa única consulta Overpass.
+    """
+    if cached is not None:
+        return features_from_elements(cached, tag, geom, nodes)
+    tags = [tag] if isinstance(tag, str) else list(tag)
+    return ox.features_from_polygon(geom, tags={t: True for t in tags})
+
+
+def split_layers(gdf: gpd.GeoDataFrame, tags=LAYER_TAGS) -> list:
+    """
+    Separa o resultado de uma consulta combinada em uma camada por tag
+    (feições com as duas tags vão para ambas), descartando colunas vazias
+    como se cada camada tivesse sido consultada à parte.
+    """
+    layers = []
+    for tag in tags:
+        part = gdf[gdf[tag].notna()] if tag in gdf.columns else gdf.iloc[:0]
+        layers.append(part.dropna(axis=1, how="all"))
+    return layers
+
+
+def encode_geometry(geoms, encoding: str = "wkt", precision: int = None) -> np.ndarray:
+    """
+    Geometrias -> texto para CSV: WKT, WKB em hex ou WKB em base64.
+    `precision` arredonda as coordenadas para essas casas decimais.
+    """
+    geoms = np.asarray(geoms, dtype=object)
+    if encoding == "wkt":
+        return shapely.to_wkt(geoms, rounding_precision=6 if precision is None else precision)
+    if precision is not None:
+        geoms = shapely.transform(geoms, lambda xy: np.round(xy, precision))
+    # WKB binário + conversão em Python: bem mais rápido que to_wkb(hex=True)
+    wkb = shapely.to_wkb(geoms)
+    if encoding == "wkb-hex":
+        return np.array([None if b is None else b.hex().upper() for b in wkb], dtype=object)
+    if encoding == "wkb-base64":
+        return np.array([None if b is None else base64.b64encode(b).decode("ascii") for b in wkb],
+                        dtype=object)
+    raise ValueError(f"codificação de geometria desconhecida: {encoding!r}")
+
+
+def to_csv_with_wkt(gdf: gpd.GeoDataFrame, csv_path: str, encoding: str = None,
+                    precision: int = None):
+    """Converte geometria para WKT (ou WKB, ver GEOMETRY_ENCODING) e salva CSV."""
     # Garante CRS WGS84 (lon/lat) para WKT legível
     if gdf.crs is None or int(gdf.crs.to_epsg() or 4326) != 4326:
         gdf = gdf.to_crs(4326)
 
-    gdf = gdf.copy()
-    # Converte geometria para WKT
-    gdf["geometry"] = gdf.geometry.to_wkt()
+    gdf = pd.DataFrame(gdf, copy=True)
+    # Converte geometria para texto
+    gdf["geometry"] = encode_geometry(gdf["geometry"].array, encoding or GEOMETRY_ENCODING,
+                                      CSV_PRECISION if precision is None else precision)
     # Salva
     gdf.to_csv(csv_path, index=False)
     print(f"  -> {csv_path}")
 
 
 def export_layer(gdf: gpd.GeoDataFrame, base_name: str):
-    """Prepara e exporta um GeoDataFrame para CSV com WKT."""
+    """Prepara e exporta um GeoDataFrame para CSV com WKT e GeoParquet."""
+    gdf = quantize(gdf, QUANTIZE_GRID)
     csv = os.path.join(OUT_DIR, f"{base_name}.csv")
     to_csv_with_wkt(gdf, csv)
+    parquet = os.path.join(OUT_DIR, f"{base_name}.parquet")
+    to_geoparquet(gdf, parquet)
+    print(f"  -> {parquet}")
+
+
+def merge_csv(paths: list, out: str) -> int:
+    """
+    Concatena os CSVs por cidade em `out` em blocos, sem decodificar o WKT,
+    descartando feições OSM repetidas (mesmo element/id, ex.: na divisa
+    entre cidades). As colunas são a união dos cabeçalhos. Retorna quantas
+    linhas foram descartadas.
+    """
+    columns = list(dict.fromkeys(c for p in paths for c in pd.read_csv(p, nrows=0).columns))
+    seen, dropped = set(), 0
+    with open(out, "w", encoding="utf-8", newline="") as f:
+        pd.DataFrame(columns=columns).to_csv(f, index=False)
+        for p in paths:
+            for chunk in pd.read_csv(p, dtype=str, keep_default_na=False, chunksize=CSV_CHUNK_ROWS):
+                keep = first_seen(chunk["element"], chunk["id"], seen)
+                dropped += int((~keep).sum())
+                chunk[keep].reindex(columns=columns, fill_value="").to_csv(f, header=False, index=False)
+    print(f"  -> {out}")
+    return dropped
 
 
-def main():
-    all_landuse = []
-    all_buildings = []
+def merge_layer(bases: list, base_name: str):
+    """Monta a camada combinada a partir das saídas já gravadas de cada cidade."""
+    dropped = merge_csv([os.path.join(OUT_DIR, f"{b}.csv") for b in bases],
+                        os.path.join(OUT_DIR, f"{base_name}.csv"))
+    parquet = os.path.join(OUT_DIR, f"{base_name}.parquet")
+    merge_geoparquet([os.path.join(OUT_DIR, f"{b}.parquet") for b in bases], parquet)
+    print(f"  -> {parquet}")
+    if dropped:
+        print(f"  ({dropped} feições repetidas entre cidades descartadas)")
 
-    for city in CITIES:
+
+def main(argv=None):
+    global GEOMETRY_ENCODING, CSV_PRECISION, QUANTIZE_GRID
+    parser = argparse.ArgumentParser(description="Exporta landuse e edificações do OSM (CSV/GeoParquet).")
+    parser.add_argument("--offline", action="store_true",
+                        help=f"reconstrói tudo a partir de ./{CACHE_DIR}, sem rede e sem OSMnx")
+    parser.add_argument("--node-index", metavar="DIR",
+                        help="(offline) grava/reusa o índice de nós em DIR, mapeado em memória; "
+                             "refeito se os arquivos do cache mudarem")
+    parser.add_argument("--geometry-encoding", choices=GEOMETRY_ENCODINGS, default=GEOMETRY_ENCODING,
+                        help=f"geometria no CSV (padrão: {GEOMETRY_ENCODING})")
+    parser.add_argument("--precision", type=int, default=CSV_PRECISION,
+                        help="casas decimais das coordenadas no CSV")
+    parser.add_argument("--grid", type=float, default=QUANTIZE_GRID,
+                        help=f"grade das coordenadas, em graus; 0 desativa (padrão: {QUANTIZE_GRID:g})")
+    parser.add_argument("--overpass-slots", type=int, default=OVERPASS_SLOTS,
+                        help=f"consultas Overpass simultâneas (padrão: {OVERPASS_SLOTS})")
+    args = parser.parse_args(argv)
+    GEOMETRY_ENCODING, CSV_PRECISION = args.geometry_encoding, args.precision
+    QUANTIZE_GRID = args.grid
+    cached = load_cached_elements() if args.offline else None
+    nodes = None
+    if cached is not None:
+        # um único índice de nós para todas as cidades e camadas
+        fingerprint = node_index_fingerprint(cached)
+        if args.node_index and NodeIndex.is_fresh(args.node_index, fingerprint):
+            nodes = NodeIndex.load(args.node_index)
+        else:
+            nodes = NodeIndex.from_elements(cached)
+            if args.node_index:
+                print(f"[nodes] gravando índice em {args.node_index}")
+                nodes.save(args.node_index, fingerprint)
+                nodes = NodeIndex.load(args.node_index)
+        print(f"[nodes] {len(nodes)} nós indexados")
+        layers = ((city, split_layers(get_features(load_cached_boundary(city), LAYER_TAGS, cached, nodes)))
+                  for city in CITIES)
+    else:
+        # online, as cidades chegam na ordem em que terminam
+        layers = fetch_all(CITIES, args.overpass_slots)
+
+    done = set()
+
+    for city, (lu, bld) in layers:
         city_slug = slugify(city)
-        geom = fetch_boundary(city)
 
         # --- Landuse
         print(f"[landuse] {city}")
-        lu = ox.features_from_polygon(geom, tags={"landuse": True})
         # garante colunas presentes conforme disponibilidade
         keep_lu = [c for c in ["landuse", "name", "geometry"] if c in lu.columns]
-        lu = lu[keep_lu].copy()
+        lu = lu[keep_lu].rename_axis(OSM_ID).reset_index()
         lu["city"] = city
         export_layer(lu, f"landuse__{city_slug}")
-        all_landuse.append(lu)
 
         # --- Buildings
         print(f"[buildings] {city}")
-        bld = ox.features_from_polygon(geom, tags={"building": True})
         keep_bld = [
             c for c in [
                 "building", "name", "addr:housenumber",
                 "addr:street", "height", "levels", "geometry"
             ] if c in bld.columns
         ]
-        bld = bld[keep_bld].copy()
+        bld = bld[keep_bld].rename_axis(OSM_ID).reset_index()
         bld["city"] = city
         export_layer(bld, f"buildings__{city_slug}")
-        all_buildings.append(bld)
+        done.add(city)
+        del lu, bld
+
+    # o merge segue a ordem de CITIES, qualquer que tenha sido a de chegada
+    landuse_bases = [f"landuse__{slugify(c)}" for c in CITIES if c in done]
+    building_bases = [f"buildings__{slugify(c)}" for c in CITIES if c in done]
 
-    # --- Merge (ambas cidades)
-    if all_landuse:
-        lu_all = gpd.GeoDataFrame(pd.concat(all_landuse, ignore_index=True), crs=4326)
-        export_layer(lu_all, "landuse__vancouver__north_vancouver")
+    # --- Merge (ambas cidades), a partir dos arquivos já gravados
+    if landuse_bases:
+        print("[landuse] merge")
+        merge_layer(landuse_bases, "landuse__vancouver__north_vancouver")
 
-    if all_buildings:
-        bld_all = gpd.GeoDataFrame(pd.concat(all_buildings, ignore_index=True), crs=4326)
-        export_layer(bld_all, "buildings__vancouver__north_vancouver")
+    if building_bases:
+        print("[buildings] merge")
+        merge_layer(building_bases, "buildings__vancouver__north_vancouver")
 
-    print("✅ Done (CSV com WKT gerados em ./data).")
+    print(f"✅ Done (CSV com geometria em {GEOMETRY_ENCODING} e GeoParquet gerados em ./{OUT_DIR}).")
 
 
 if __name__ == "__main__":
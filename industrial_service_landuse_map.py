@@ -2,13 +2,24 @@
 industrial_service_landuse_map_from_github.py
 
 Pipeline (sem OSMnx):
-1) Carrega landuse direto de URLs do GitHub (GeoPackage .gpkg)
+1) Carrega landuse direto de URLs do GitHub (GeoPackage .gpkg, ou CSV do
+   export com geometria em WKT/WKB) e ajusta as coordenadas a uma grade
+   fixa (QUANTIZE_GRID)
 2) Classifica setor (service / industrial) e intensidade (1-4)
-3) Exporta camadas enriquecidas (GPKG/CSV)
-4) Gera mapas estáticos (PNG) com matplotlib
+3) Exporta camadas enriquecidas (GPKG/CSV/GeoParquet)
+4) Gera mapas estáticos (PNG) com matplotlib e, com --tiles, uma pirâmide
+   de tiles XYZ (tiles/<camada>/{z}/{x}/{y}.png); com --mvt, vector tiles
+   em tiles/<camada>.mbtiles
 
 Requisitos:
     pip install geopandas pandas shapely matplotlib fiona
+    pip install pyarrow pyogrio   # opcionais: classificação em lote, I/O via Arrow, GeoParquet
+    (e landuse_common.py, no mesmo diretório)
+
+Uso:
+    python industrial_service_landuse_map.py [--workers N] [--io-engine arrow|pyogrio|fiona]
+                                             [--grid GRAUS] [--tiles ZMIN-ZMAX] [--mvt ZMIN-ZMAX]
+                                             [--dissolve] [--simplify-px PX]
 
 Observação:
 - Use URLs "raw" do GitHub, por ex.:
@@ -17,10 +28,44 @@ Observação:
 
 import os
 import re
+import gzip
 import json
+import base64
+import shutil
+import argparse
+import hashlib
+import sqlite3
+import tempfile
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
 import pandas as pd
 import geopandas as gpd
+import shapely
 import matplotlib.pyplot as plt
+from matplotlib.collections import PathCollection
+from matplotlib.figure import Figure
+from matplotlib.path import Path
+
+from landuse_common import PARQUET_COMPRESSION, merge_geoparquet, quantize, to_geoparquet
+
+try:  # opcional: acelera a montagem de texto em lote (texts_from_frame) e
+      # habilita a saída GeoParquet
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.csv as pcsv
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pc = pcsv = pq = None
+
+try:  # opcional: cópia de feições GPKG via Arrow, sem recodificar geometrias
+    import pyogrio
+except ImportError:
+    pyogrio = None
 
 # ---------------------------------------------------------------------
 # CONFIG: edite aqui as URLs para seus arquivos no GitHub
@@ -37,6 +82,7 @@ GPKG_LAYER_NAME = "landuse"  # layer salvo no export anterior
 
 OUT_DATA = "data"
 OUT_MAPS = "maps"
+OUT_TILES = "tiles"
 os.makedirs(OUT_DATA, exist_ok=True)
 os.makedirs(OUT_MAPS, exist_ok=True)
 
@@ -45,6 +91,11 @@ BLUE   = {1: "#E8F1FA", 2: "#A9C8EA", 3: "#5B8FCB", 4: "#1F4E94"}   # Services
 ORANGE = {1: "#FCECDD", 2: "#F7B87A", 3: "#E97A1C", 4: "#8C3D06"}  # Industrial
 NEUTRAL = "#DDDDDD"
 
+# Categorias das colunas sector / intensity / fill (pandas Categorical)
+SECTORS = ["service", "industrial"]
+INTENSITIES = [1, 2, 3, 4]
+FILLS = list(dict.fromkeys([*BLUE.values(), *ORANGE.values(), NEUTRAL]))
+
 # Campos comuns a verificar (se existirem)
 ATTR_FIELDS = [
     "landuse","building","name","amenity","shop","office","industrial","craft",
@@ -67,12 +118,154 @@ RULES = {
     },
 }
 
+# Versão do classificador: incremente ao mudar a lógica de classify/classify_frame
+# (invalida o cache persistente junto com mudanças em RULES/ATTR_FIELDS)
+CLASSIFIER_VERSION = 1
+CLASSIFICATION_DB = os.path.join(OUT_DATA, "classification_cache.sqlite")
+CLASSIFICATION_DB_MAX_ROWS = 1_000_000  # acima disso, as menos usadas saem
+
+# Backend de I/O vetorial: "arrow" (pyogrio + Arrow, geometria trafega como
+# WKB entre GDAL e shapely), "pyogrio" ou "fiona"
+IO_ENGINE = "arrow"
+
+# Cache local dos GeoPackages baixados (endereçado por conteúdo, revalidado
+# por ETag/Last-Modified)
+DOWNLOAD_CACHE = os.path.join("cache", "downloads")
+DOWNLOAD_CACHE_MAX_BYTES = 2 * 1024**3
+
+# Grade das coordenadas (unidades do CRS; os dados estão em EPSG:4326 e
+# 1e-6 grau ~ 0,1 m, de sobra para mapas de cidade). 0 desativa.
+QUANTIZE_GRID = 1e-6
+
+# Tiles XYZ (Web Mercator, esquema do OpenStreetMap/Google: y cresce para o sul)
+TILE_SIZE = 256
+TILE_ZOOMS = (10, 15)
+WEB_MERCATOR_HALF = 20037508.342789244  # metade do mundo em EPSG:3857
+
+# Vector tiles (MVT 2.1, gzip, em MBTiles): grade inteira por tile, borda
+# de recorte (mesmas unidades) e atributos levados para o visualizador.
+# Mudar MVT_ENCODER_VERSION força a recodificação de todos os tiles.
+MVT_LAYER = "landuse"
+MVT_FIELDS = ["sector", "intensity", "fill"]
+MVT_EXTENT = 4096
+MVT_BUFFER = 64
+MVT_ENCODER_VERSION = 1
+
+# Dissolve por cor antes de desenhar (--dissolve): polígonos de mesmo `fill`
+# são unidos em blocos de uma grade DISSOLVE_CHUNKS x DISSOLVE_CHUNKS (em
+# paralelo) e depois por classe; o resultado fica em cache, chaveado pelo
+# conteúdo da camada (até DISSOLVE_CACHE_MAX_BYTES, os menos usados saem antes)
+DISSOLVE_CHUNKS = 4
+DISSOLVE_CACHE = os.path.join("cache", "dissolve")
+DISSOLVE_CACHE_MAX_BYTES = 512 * 1024**2
+
+# Mapas estáticos (polegadas, dpi) e simplificação para desenho: tolerância
+# de RENDER_SIMPLIFY_PX pixels da saída (mapa ou tile), topologia preservada;
+# o resultado fica em cache por hash das geometrias + tolerância (até
+# RENDER_CACHE_MAX_BYTES, os menos usados saem antes). 0 desativa.
+MAP_SIZE_IN = 10
+MAP_DPI = 220
+RENDER_SIMPLIFY_PX = 0.5
+RENDER_CACHE = os.path.join("cache", "simplify")
+RENDER_CACHE_MAX_BYTES = 512 * 1024**2
+
 # ---------------------------------------------------------------------
 # HELPERS
 # ---------------------------------------------------------------------
 def slug(s: str) -> str:
     return re.sub(r"[^a-z0-9]+","_",s.lower()).strip("_")
 
+def _trie_pattern(items) -> str:
+    """
+    Regex em forma de trie para [(sufixo, índice)]: prefixos comuns são
+    fatorados e o fim de cada palavra-chave é marcado por um grupo vazio
+    nomeado k<índice>.
+    """
+    branches, leaves = {}, []
+    for suffix, idx in items:
+        if suffix:
+            branches.setdefault(suffix[0], []).append((suffix[1:], idx))
+        else:
+            leaves.append(idx)
+    alts = [re.escape(ch) + _trie_pattern(sub) for ch, sub in branches.items()]
+    alts += [f"(?P<k{idx}>)" for idx in leaves]
+    return alts[0] if len(alts) == 1 else "(?:" + "|".join(alts) + ")"
+
+class KeywordMatcher:
+    """
+    Casador multi-palavra compilado uma vez a partir de RULES.
+
+    Todas as palavras-chave formam uma única regex (trie dentro de um
+    lookahead), de modo que uma só varredura do texto devolve todas as faixas
+    (setor, intensidade) encontradas, já em ordem de prioridade: industrial
+    primeiro, maior intensidade primeiro.
+    Em cada posição a regex para na palavra mais longa; por isso cada
+    palavra-chave carrega também as faixas de todas as palavras que são seu
+    prefixo (ex.: "it" e "items"), e nenhuma faixa se perde.
+    """
+
+    def __init__(self, rules: dict):
+        self.tiers = [(sector, level)
+                      for sector in ("industrial", "service")
+                      for level in rules[sector]]
+        self.keywords = [(k, t) for t, (sector, level) in enumerate(self.tiers)
+                         for k in rules[sector][level]]
+        self.hit_tiers = [frozenset(t2 for k2, t2 in self.keywords if k.startswith(k2))
+                          for k, _ in self.keywords]
+        self.regex = re.compile(
+            "(?=" + _trie_pattern([(k, i) for i, (k, _) in enumerate(self.keywords)]) + ")")
+        # um padrão por faixa, para o caminho vetorizado (str.contains)
+        self.tier_patterns = ["|".join(re.escape(k) for k in rules[sector][level])
+                              for sector, level in self.tiers]
+
+    def match(self, text: str) -> list:
+        """Faixas (setor, intensidade) presentes em `text`, por prioridade."""
+        hit = set()
+        for m in self.regex.finditer(text):
+            hit |= self.hit_tiers[int(m.lastgroup[1:])]
+        return [self.tiers[t] for t in sorted(hit)]
+
+    def match_many(self, texts) -> list:
+        """match() para cada texto de um iterável."""
+        return [self.match(t) for t in texts]
+
+MATCHER = KeywordMatcher(RULES)
+
+def _value_text(val):
+    """
+    Texto de um único valor de atributo, ou None se for nulo (NaN/None,
+    listas/Series inteiramente nulas). Listas/Series viram itens separados
+    por espaço.
+    """
+    if val is None:
+        return None
+    try:
+        is_na = pd.isna(val)
+        if hasattr(is_na, "__iter__"):
+            # se vier array/Series de bools, considera NaN somente se todos forem True
+            if bool(pd.Series(is_na).all()):
+                return None
+        else:
+            if is_na:
+                return None
+    except Exception:
+        pass
+
+    if isinstance(val, (list, tuple, set)):
+        parts = []
+        for x in val:
+            if x is not None:
+                try:
+                    if pd.isna(x):
+                        continue
+                except Exception:
+                    pass
+                parts.append(str(x))
+        return " ".join(parts) if parts else None
+    if isinstance(val, pd.Series):
+        return " ".join(map(str, val.dropna().tolist()))
+    return str(val)
+
 def text_from_row(row: pd.Series) -> str:
     """
     Concatena valores textuais da linha (exceto geometria) de forma robusta,
@@ -82,50 +275,73 @@ def text_from_row(row: pd.Series) -> str:
     for key, val in row.items():
         if key == "geometry":
             continue
-        if val is None:
-            continue
-        try:
-            is_na = pd.isna(val)
-            if hasattr(is_na, "__iter__"):
-                # se vier array/Series de bools, considera NaN somente se todos forem True
-                if bool(pd.Series(is_na).all()):
-                    continue
-            else:
-                if is_na:
-                    continue
-        except Exception:
-            pass
-
-        if isinstance(val, (list, tuple, set)):
-            for x in val:
-                if x is not None:
-                    try:
-                        if pd.isna(x): 
-                            continue
-                    except Exception:
-                        pass
-                    parts.append(str(x))
-        elif isinstance(val, pd.Series):
-            parts.append(" ".join(map(str, val.dropna().tolist())))
-        else:
-            parts.append(str(val))
+        txt = _value_text(val)
+        if txt is not None:
+            parts.append(txt)
     return " ".join(parts).lower()
 
+def _column_parts(s: pd.Series) -> pd.Series:
+    """Texto de cada valor de uma coluna (None para nulos), como em _value_text."""
+    if pd.api.types.infer_dtype(s, skipna=True) in ("string", "empty"):
+        # caminho rápido: coluna só de strings (caso comum do GPKG)
+        return s
+    if s.dtype == object:
+        return s.map(_value_text)
+    return s.astype(str).where(s.notna(), None)
+
+def texts_from_frame(gdf: pd.DataFrame) -> pd.Series:
+    """
+    Versão vetorizada de text_from_row(): monta o texto de todas as linhas
+    coluna a coluna, com a mesma semântica de NaN/listas e o mesmo texto,
+    byte a byte. Com pyarrow, junção e minúsculas rodam em arrays Arrow
+    (sem criar objetos Python por linha) e o resultado é uma Series Arrow.
+    """
+    parts = [_column_parts(col) for name, col in gdf.items() if name != "geometry"]
+    if pa is None or not parts:
+        return _join_parts_numpy(parts, gdf.index)
+
+    arrays = [pa.array(p, type=pa.string(), from_pandas=True) for p in parts]
+    # coluna inicial "" sempre presente: linhas inteiramente nulas somem do
+    # resultado de binary_join_element_wise(null_handling="skip"); com ela o
+    # texto sai como " ..." e o primeiro separador é removido em seguida
+    lead = pa.array(np.full(len(gdf), "", dtype=object), type=pa.string())
+    joined = pc.binary_join_element_wise(lead, *arrays, " ", null_handling="skip")
+    joined = pc.utf8_slice_codeunits(joined, 1)
+    lowered = pc.utf8_lower(joined)
+    # utf8_lower difere de str.lower em alguns casos fora do ASCII
+    # (ex.: "İ", sigma final): essas poucas linhas usam str.lower
+    non_ascii = pc.invert(pc.string_is_ascii(joined))
+    if pc.any(non_ascii).as_py():
+        fixed = [t.lower() for t in pc.filter(joined, non_ascii).to_pylist()]
+        lowered = pc.replace_with_mask(lowered, non_ascii, pa.array(fixed, type=pa.string()))
+    return pd.Series(pd.arrays.ArrowExtensionArray(lowered), index=gdf.index)
+
+def _join_parts_numpy(parts, index) -> pd.Series:
+    """Junção de texto em arrays numpy de objetos (caminho sem pyarrow)."""
+    out = np.full(len(index), "", dtype=object)
+    has = np.zeros(len(index), dtype=bool)
+    for part in parts:
+        part = part.to_numpy(dtype=object)
+        valid = pd.notna(part)
+        if not valid.any():
+            continue
+        sep = np.where(has[valid], " ", "").astype(object)
+        out[valid] = out[valid] + sep + part[valid]
+        has |= valid
+    return pd.Series(out, index=index, dtype=object).str.lower()
+
 def classify(row: pd.Series):
     txt = text_from_row(row)
 
-    # Industrial primeiro (evita confundir fábrica com serviço)
-    for intensity, keys in RULES["industrial"].items():
-        if any(k in txt for k in keys):
-            return "industrial", intensity
-
-    # Depois serviços
-    for intensity, keys in RULES["service"].items():
-        if any(k in txt for k in keys):
-            return "service", intensity
+    # Industrial primeiro (evita confundir fábrica com serviço), depois
+    # serviços: MATCHER já devolve as faixas nessa ordem
+    hits = MATCHER.match(txt)
+    if hits:
+        return hits[0]
 
     # fallback leve por landuse
-    lu = (row.get("landuse") or "").lower()
+    lu = row.get("landuse")
+    lu = str(lu).lower() if pd.notna(lu) else ""
     if lu == "industrial":
         return "industrial", 2
     if lu == "commercial":
@@ -133,6 +349,226 @@ def classify(row: pd.Series):
 
     return None, None
 
+def classify_frame(gdf: pd.DataFrame):
+    """
+    Versão vetorizada de classify(): cada faixa de RULES vira uma máscara
+    booleana sobre o quadro inteiro, resolvida com a mesma prioridade
+    (industrial primeiro, maior intensidade primeiro).
+    Retorna (sector, intensity) como arrays numpy (object / float com NaN).
+    """
+    n = len(gdf)
+    txt = texts_from_frame(gdf)
+    sector = np.full(n, None, dtype=object)
+    intensity = np.full(n, np.nan)
+    done = np.zeros(n, dtype=bool)
+
+    for (sec, level), pat in zip(MATCHER.tiers, MATCHER.tier_patterns):
+        todo = ~done
+        if not todo.any():
+            break
+        hit = np.zeros(n, dtype=bool)
+        hit[todo] = txt[todo].str.contains(pat, regex=True).to_numpy(dtype=bool)
+        sector[hit] = sec
+        intensity[hit] = level
+        done |= hit
+
+    # fallback leve por landuse
+    if "landuse" in gdf.columns and not done.all():
+        lu = gdf["landuse"].where(gdf["landuse"].notna(), "").astype(str).str.lower().to_numpy()
+        for value, sec in (("industrial", "industrial"), ("commercial", "service")):
+            hit = ~done & (lu == value)
+            sector[hit] = sec
+            intensity[hit] = 2
+            done |= hit
+
+    return sector, intensity
+
+class ClassificationCache:
+    """
+    Cache LRU de (setor, intensidade) por assinatura de atributos
+    (nomes + valores das colunas lidas por text_from_row); contabiliza
+    acertos/erros. Pode ser compartilhado entre cidades, mas a assinatura
+    inclui a coluna `city` (text_from_row também a lê), então uma cidade
+    nunca acerta entradas de outra: o ganho vem de linhas repetidas dentro
+    de cada cidade e, com o cache persistente, de execuções repetidas.
+    """
+
+    def __init__(self, maxsize: int = 200_000):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.rows = 0  # linhas atendidas (antes da deduplicação)
+
+    def get(self, key):
+        try:
+            value = self._data[key]
+        except KeyError:
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        self._data[key] = value
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def __len__(self):
+        return len(self._data)
+
+    def __str__(self):
+        return (f"{self.rows} linhas -> {self.misses} classificadas | "
+                f"hits={self.hits} misses={self.misses} | hit rate={self.hit_rate:.1%}")
+
+def rules_hash() -> str:
+    """Hash de RULES + ATTR_FIELDS + CLASSIFIER_VERSION (chave de invalidação)."""
+    payload = json.dumps({"rules": RULES, "attr_fields": ATTR_FIELDS,
+                          "version": CLASSIFIER_VERSION}, sort_keys=True)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+class PersistentClassificationCache(ClassificationCache):
+    """
+    ClassificationCache persistido em SQLite, para que execuções repetidas só
+    classifiquem feições novas ou modificadas. Cada entrada é gravada com o
+    rules_hash() atual; ao abrir, entradas de outras versões são descartadas.
+
+    A chave é a assinatura de atributos, não o (element, id) do OSM: os GPKGs
+    trazem essas colunas, mas o loader não as lê e a classificação depende só
+    dos atributos, então feições iguais compartilham a mesma entrada.
+    Ao abrir, só as `maxsize` entradas usadas mais recentemente vão para a
+    memória (as demais são lidas do banco sob demanda); a cada flush(), a
+    tabela é podada para `max_rows` linhas, das menos usadas para as mais.
+    """
+
+    def __init__(self, path: str = CLASSIFICATION_DB, maxsize: int = 200_000,
+                 max_rows: int = CLASSIFICATION_DB_MAX_ROWS):
+        super().__init__(maxsize)
+        self.path = path
+        self.max_rows = max_rows
+        self.rules_hash = rules_hash()
+        self._pending = {}
+        self._touched = set()
+        self._db = sqlite3.connect(path, timeout=60)  # pode ser compartilhado entre processos
+        columns = [row[1] for row in self._db.execute("PRAGMA table_info(classification)")]
+        if columns and "used" not in columns:
+            self._db.execute("DROP TABLE classification")  # formato antigo, sem uso registrado
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS classification ("
+            " rules_hash TEXT NOT NULL, signature TEXT NOT NULL,"
+            " sector TEXT, intensity INTEGER, used REAL NOT NULL,"
+            " PRIMARY KEY (rules_hash, signature))")
+        self._db.execute("DELETE FROM classification WHERE rules_hash != ?", (self.rules_hash,))
+        self._db.commit()
+        self._stored = self._db.execute("SELECT COUNT(*) FROM classification").fetchone()[0]
+        rows = self._db.execute(
+            "SELECT signature, sector, intensity FROM classification WHERE rules_hash = ?"
+            " ORDER BY used DESC LIMIT ?", (self.rules_hash, maxsize)).fetchall()
+        for sig, sector, intensity in reversed(rows):  # mais recente por último (LRU)
+            self._data[sig] = (sector, np.nan if intensity is None else intensity)
+        print(f"[cache] {path}: {len(self._data)} de {self._stored} assinaturas carregadas")
+
+    @staticmethod
+    def _digest(key) -> str:
+        return hashlib.sha1(repr(key).encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        digest = self._digest(key)
+        value = super().get(digest)
+        if value is None and self._stored > len(self._data):
+            row = self._db.execute(
+                "SELECT sector, intensity FROM classification"
+                " WHERE rules_hash = ? AND signature = ?", (self.rules_hash, digest)).fetchone()
+            if row is not None:
+                # estava só no banco: conta como acerto e volta para a memória
+                self.misses -= 1
+                self.hits += 1
+                value = (row[0], np.nan if row[1] is None else row[1])
+                super().put(digest, value)
+        if value is not None:
+            self._touched.add(digest)
+        return value
+
+    def put(self, key, value):
+        digest = self._digest(key)
+        super().put(digest, value)
+        self._pending[digest] = value
+
+    def flush(self):
+        if not self._pending and not self._touched:
+            return
+        now = time.time()
+        self._db.executemany(
+            "INSERT OR REPLACE INTO classification VALUES (?, ?, ?, ?, ?)",
+            [(self.rules_hash, sig, sector, None if pd.isna(lvl) else int(lvl), now)
+             for sig, (sector, lvl) in self._pending.items()])
+        self._db.executemany(
+            "UPDATE classification SET used = ? WHERE rules_hash = ? AND signature = ?",
+            [(now, self.rules_hash, sig) for sig in self._touched - self._pending.keys()])
+        self._stored = self._db.execute("SELECT COUNT(*) FROM classification").fetchone()[0]
+        if self._stored > self.max_rows:
+            self._db.execute(
+                "DELETE FROM classification WHERE rowid IN"
+                " (SELECT rowid FROM classification ORDER BY used LIMIT ?)",
+                (self._stored - self.max_rows,))
+            self._stored = self.max_rows
+        self._db.commit()
+        self._pending.clear()
+        self._touched.clear()
+
+    def close(self):
+        self.flush()
+        self._db.close()
+
+def _signature_column(s: pd.Series) -> list:
+    """Valores hasheáveis de uma coluna: nulos -> None, listas/sets/Series -> tuple."""
+    if pd.api.types.infer_dtype(s, skipna=True) not in ("string", "empty") and s.dtype == object:
+        s = s.map(lambda v: tuple(v.dropna()) if isinstance(v, pd.Series)
+                  else tuple(v) if isinstance(v, (list, tuple, set)) else v)
+    return s.astype(object).where(s.notna(), None).tolist()
+
+def classify_frame_cached(gdf: pd.DataFrame, cache: ClassificationCache = None):
+    """
+    classify_frame() sobre assinaturas únicas: linhas com os mesmos atributos
+    são classificadas uma única vez (ou lidas do cache) e o resultado é
+    propagado de volta. Retorna (sector, intensity) como classify_frame().
+    """
+    if cache is None:
+        cache = ClassificationCache()
+    cols = tuple(c for c in gdf.columns if c != "geometry")
+    sigs = pd.Series(list(zip(*(_signature_column(col) for name, col in gdf.items()
+                                if name != "geometry"))),
+                     index=gdf.index, dtype=object)
+    codes, uniques = pd.factorize(sigs)
+    cache.rows += len(gdf)
+
+    sector_u = np.full(len(uniques), None, dtype=object)
+    intensity_u = np.full(len(uniques), np.nan)
+    missing = []
+    for i, sig in enumerate(uniques):
+        found = cache.get((cols, sig))
+        if found is None:
+            missing.append(i)
+        else:
+            sector_u[i], intensity_u[i] = found
+
+    if missing:
+        todo = pd.DataFrame([uniques[i] for i in missing], columns=list(cols))
+        sec, lvl = classify_frame(todo)
+        sector_u[missing] = sec
+        intensity_u[missing] = lvl
+        for i, s, l in zip(missing, sec, lvl):
+            cache.put((cols, uniques[i]), (s, l))
+
+    return sector_u[codes], intensity_u[codes]
+
 def color_for(sector, intensity):
     if sector == "service":
         return BLUE.get(intensity, BLUE[1])
@@ -140,76 +576,913 @@ def color_for(sector, intensity):
         return ORANGE.get(intensity, ORANGE[1])
     return NEUTRAL
 
+# códigos de FILLS por (código de sector + 1, código de intensity + 1); o
+# índice 0 de cada eixo corresponde a nulo (código -1)
+_FILL_CODES = np.array([[FILLS.index(color_for(sector, intensity))
+                         for intensity in [None, *INTENSITIES]]
+                        for sector in [None, *SECTORS]], dtype=np.int8)
+
+def categorize(sector, intensity):
+    """
+    Converte sector/intensity em Categoricals e calcula fill por tabela de
+    códigos (mesmo resultado de color_for, sem laço por linha).
+    Retorna (sector, intensity, fill).
+    """
+    sector = pd.Categorical(sector, categories=SECTORS)
+    intensity = pd.Categorical(intensity, categories=INTENSITIES)
+    codes = _FILL_CODES[sector.codes + 1, intensity.codes + 1]
+    return sector, intensity, pd.Categorical.from_codes(codes, categories=FILLS)
+
+def io_options() -> dict:
+    """Argumentos de gpd.read_file / GeoDataFrame.to_file para IO_ENGINE."""
+    if IO_ENGINE == "fiona":
+        return {"engine": "fiona"}
+    if pyogrio is None:
+        return {}  # padrão do geopandas
+    if IO_ENGINE == "arrow" and pa is not None:
+        return {"engine": "pyogrio", "use_arrow": True}
+    return {"engine": "pyogrio"}
+
+def evict_lru(directory: str, max_bytes: int, keep: str = None):
+    """
+    Remove de `directory` os arquivos menos usados recentemente (pelo mtime;
+    quem lê do cache faz os.utime) até o total caber em max_bytes. `keep`
+    (o arquivo recém-usado) nunca é removido; .tmp em escrita são ignorados.
+    """
+    files = []
+    for name in os.listdir(directory):
+        path = os.path.join(directory, name)
+        if name.endswith(".tmp") or path == keep:
+            continue
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:  # removido por outro processo
+            continue
+        files.append((st.st_mtime, st.st_size, path))
+    total = sum(size for _, size, _ in files) + (os.path.getsize(keep) if keep else 0)
+    for _, size, path in sorted(files):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+
+def write_cached(path: str, write, max_bytes: int):
+    """
+    Grava uma entrada de cache: write(tmp) escreve num arquivo temporário do
+    mesmo diretório, que então substitui `path` (os.replace, atômico), e o
+    diretório é podado a max_bytes com evict_lru (sem remover `path`).
+    """
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    os.close(fd)
+    try:
+        write(tmp)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    evict_lru(directory, max_bytes, keep=path)
+
+class DownloadCache:
+    """
+    Cache local de downloads, endereçado por conteúdo.
+
+    objects/<sha256><ext> guarda os arquivos; index/<sha1(url)>.json aponta
+    cada URL para o objeto atual, com ETag/Last-Modified. Cada fetch()
+    revalida com GET condicional (304 -> usa o arquivo local); sem rede ou
+    com erro HTTP, usa a última cópia. Gravações são atômicas (arquivo
+    temporário + os.replace) e, acima de max_bytes, os objetos menos usados
+    recentemente são removidos.
+    """
+
+    def __init__(self, root: str = DOWNLOAD_CACHE, max_bytes: int = DOWNLOAD_CACHE_MAX_BYTES,
+                 timeout: float = 60):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        self.objects = os.path.join(root, "objects")
+        self.index = os.path.join(root, "index")
+
+    def _entry_path(self, url: str) -> str:
+        return os.path.join(self.index, hashlib.sha1(url.encode("utf-8")).hexdigest() + ".json")
+
+    def _read_entry(self, url: str):
+        try:
+            with open(self._entry_path(url), encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return entry if os.path.exists(os.path.join(self.objects, entry["object"])) else None
+
+    def _write_entry(self, url: str, entry: dict):
+        fd, tmp = tempfile.mkstemp(dir=self.index, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(entry, f)
+        os.replace(tmp, self._entry_path(url))
+
+    def fetch(self, url: str) -> str:
+        """Caminho local com o conteúdo atual de `url` (baixa só se mudou)."""
+        if not url.startswith(("http://", "https://")):
+            return url  # arquivo local: nada a cachear
+        os.makedirs(self.objects, exist_ok=True)
+        os.makedirs(self.index, exist_ok=True)
+
+        entry = self._read_entry(url)
+        req = urllib.request.Request(url)
+        if entry is not None:
+            if entry.get("etag"):
+                req.add_header("If-None-Match", entry["etag"])
+            if entry.get("last_modified"):
+                req.add_header("If-Modified-Since", entry["last_modified"])
+
+        try:
+            with urllib.request.urlopen(req, timeout=self.timeout) as resp:
+                entry = self._store(url, resp)
+            print(f"  [download] {url} ({entry['size']} bytes)")
+        except urllib.error.HTTPError as e:
+            if entry is None:
+                raise
+            if e.code == 304:
+                print(f"  [cache] {url}: não modificado")
+            else:  # ex.: 5xx do GitHub; a última cópia ainda serve
+                print(f"  [cache] {url}: HTTP {e.code}, usando cópia local")
+        except (urllib.error.URLError, OSError) as e:
+            if entry is None:
+                raise
+            print(f"  [cache] {url}: sem rede ({e}), usando cópia local")
+
+        path = os.path.join(self.objects, entry["object"])
+        os.utime(path)  # marca como usado recentemente (LRU da remoção)
+        self.evict(keep=path)
+        return path
+
+    def _store(self, url: str, resp) -> dict:
+        ext = os.path.splitext(urllib.parse.urlsplit(url).path)[1]
+        digest = hashlib.sha256()
+        fd, tmp = tempfile.mkstemp(dir=self.objects, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                for chunk in iter(lambda: resp.read(1 << 20), b""):
+                    digest.update(chunk)
+                    f.write(chunk)
+            name = digest.hexdigest() + ext
+            os.replace(tmp, os.path.join(self.objects, name))
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+        entry = {"url": url, "object": name, "size": os.path.getsize(os.path.join(self.objects, name)),
+                 "etag": resp.headers.get("ETag"),
+                 "last_modified": resp.headers.get("Last-Modified")}
+        self._write_entry(url, entry)
+        return entry
+
+    def evict(self, keep: str = None):
+        """Remove os objetos menos usados recentemente até caber em max_bytes."""
+        evict_lru(self.objects, self.max_bytes, keep)
+
+DOWNLOADS = DownloadCache()
+
+_WKB_HEX = re.compile(r"0[01][0-9A-Fa-f]+")
+
+def decode_geometry(values) -> np.ndarray:
+    """
+    Texto de geometria -> shapely, em lote. A codificação (WKT, WKB em hex
+    ou WKB em base64, ver export_landuse_buildings.py) é detectada pelo
+    primeiro valor preenchido; vazios viram None.
+    """
+    values = pd.Series(values, dtype=object)
+    values = values.where(values.notna() & (values != ""), None).to_numpy()
+    first = next((v for v in values if v is not None), None)
+    if first is None:
+        return np.full(len(values), None, dtype=object)
+    if " " in first or "(" in first:
+        return shapely.from_wkt(values)
+    # hex/base64 -> bytes em Python: bem mais rápido que from_wkb sobre hex
+    decode = bytes.fromhex if _WKB_HEX.fullmatch(first) else base64.b64decode
+    return shapely.from_wkb(np.array([None if v is None else decode(v) for v in values],
+                                     dtype=object))
+
+def read_geometry_csv(path: str, columns: list = None, crs=4326) -> gpd.GeoDataFrame:
+    """
+    Lê um CSV do export (coluna "geometry" em WKT/WKB) como GeoDataFrame.
+    Com pyarrow, o parsing é multithread e só as `columns` pedidas são lidas.
+    """
+    header = pd.read_csv(path, nrows=0).columns
+    cols = [c for c in (columns or header) if c in header and c != "geometry"] + ["geometry"]
+    if pcsv is not None:
+        table = pcsv.read_csv(path, convert_options=pcsv.ConvertOptions(
+            include_columns=cols, column_types={c: pa.string() for c in cols},
+            strings_can_be_null=True))
+        geoms = decode_geometry(table.column("geometry").to_numpy(zero_copy_only=False))
+        df = table.drop_columns(["geometry"]).to_pandas()
+    else:
+        df = pd.read_csv(path, usecols=cols, dtype=str)
+        geoms = decode_geometry(df.pop("geometry"))
+    return gpd.GeoDataFrame(df, geometry=geoms, crs=crs)
+
 def load_landuse_from_github(url: str, layer: str) -> gpd.GeoDataFrame:
     """
-    Lê um GeoPackage hospedado no GitHub (URL com /raw/) usando fiona/GDAL.
+    Lê um GeoPackage hospedado no GitHub (URL com /raw/) usando fiona/GDAL,
+    passando pelo cache local de downloads (DOWNLOADS).
+    Com pyogrio, a seleção de colunas e o filtro de polígonos são feitos na
+    leitura (GDAL/SQLite), sem materializar linhas e colunas descartadas.
+    URLs .csv (saída do export, geometria em WKT/WKB) usam read_geometry_csv.
     """
     print(f"[load] {url}")
-    gdf = gpd.read_file(url, layer=layer)
+    path = DOWNLOADS.fetch(url)
+    wanted = list(dict.fromkeys(["landuse","name"] + ATTR_FIELDS))
+    if path.lower().endswith(".csv"):
+        gdf = read_geometry_csv(path, columns=wanted)
+    elif pyogrio is not None and IO_ENGINE != "fiona":
+        info = pyogrio.read_info(path, layer=layer)
+        columns = [c for c in wanted if c in info["fields"]]
+        where = None
+        if info["driver"] in ("GPKG", "SQLite") and info["geometry_name"]:
+            where = (f'ST_GeometryType("{info["geometry_name"]}") '
+                     "IN ('POLYGON','MULTIPOLYGON')")
+        gdf = gpd.read_file(path, layer=layer, columns=columns, where=where, **io_options())
+    else:
+        gdf = gpd.read_file(path, layer=layer, **io_options())
     # garantir somente polígonos
     gdf = gdf[gdf.geometry.type.isin(["Polygon","MultiPolygon"])].copy()
     # manter apenas campos úteis (se existirem)
-    keep = [c for c in ["landuse","name"] + ATTR_FIELDS if c in gdf.columns] + ["geometry"]
+    keep = [c for c in wanted if c in gdf.columns] + ["geometry"]
     return gdf[keep].copy()
 
-def enrich(gdf: gpd.GeoDataFrame) -> gpd.GeoDataFrame:
+def enrich(gdf: gpd.GeoDataFrame, cache: ClassificationCache = None) -> gpd.GeoDataFrame:
     if gdf.empty:
         gdf["sector"]=[]; gdf["intensity"]=[]; gdf["fill"]=[]; return gdf
-    pairs = gdf.apply(classify, axis=1)
-    gdf["sector"]    = [p[0] for p in pairs]
-    gdf["intensity"] = [p[1] for p in pairs]
-    gdf["fill"]      = gdf.apply(lambda r: color_for(r["sector"], r["intensity"]), axis=1)
+    sector, intensity = classify_frame_cached(gdf, cache)
+    gdf["sector"], gdf["intensity"], gdf["fill"] = categorize(sector, intensity)
+    return gdf
+
+def _plain_columns(gdf: gpd.GeoDataFrame) -> gpd.GeoDataFrame:
+    """Categoricals -> dtype das categorias (o backend fiona não aceita Categorical)."""
+    cats = {name: col for name, col in gdf.items() if isinstance(col.dtype, pd.CategoricalDtype)}
+    if not cats:
+        return gdf
+    gdf = gdf.copy()
+    for name, col in cats.items():
+        dtype = col.cat.categories.dtype
+        if dtype.kind in "iu" and col.isna().any():
+            dtype = float
+        gdf[name] = col.astype(dtype)
     return gdf
 
 def save_outputs(gdf: gpd.GeoDataFrame, base: str):
     gpkg = os.path.join(OUT_DATA, f"{base}.gpkg")
     csv  = os.path.join(OUT_DATA, f"{base}.csv")
+    parquet = os.path.join(OUT_DATA, f"{base}.parquet")
     if not gdf.empty:
-        gdf.to_file(gpkg, layer="landuse", driver="GPKG")
+        (_plain_columns(gdf) if IO_ENGINE == "fiona" else gdf).to_file(
+            gpkg, layer="landuse", driver="GPKG", **io_options())
         gdf.drop(columns="geometry").to_csv(csv, index=False)
-    print(f"  -> {gpkg} | {csv}")
+        if pq is not None:
+            to_geoparquet(gdf, parquet)
+    print(f"  -> {gpkg} | {csv}" + (f" | {parquet}" if pq is not None else ""))
 
-def plot_matplotlib(gdf: gpd.GeoDataFrame, title: str, out_png: str):
-    if gdf.empty:
+def merge_outputs(bases: list, base: str):
+    """
+    Monta a camada combinada a partir das saídas já gravadas de cada cidade,
+    sem concatenar nem reserializar os GeoDataFrames: o GPKG recebe as
+    feições de cada cidade via Arrow (geometria copiada em WKB), o CSV é a
+    concatenação dos CSVs por cidade e o GeoParquet junta seus row groups.
+    """
+    gpkg = os.path.join(OUT_DATA, f"{base}.gpkg")
+    csv  = os.path.join(OUT_DATA, f"{base}.csv")
+    parquet = os.path.join(OUT_DATA, f"{base}.parquet")
+    for path in (gpkg, csv, parquet):
+        if os.path.exists(path):
+            os.remove(path)
+    srcs = [b for b in bases if os.path.exists(os.path.join(OUT_DATA, f"{b}.gpkg"))]
+    if not srcs:
+        return
+
+    # GPKG: anexa cidade a cidade
+    paths = [os.path.join(OUT_DATA, f"{b}.gpkg") for b in srcs]
+    if IO_ENGINE == "arrow" and pyogrio is not None and pa is not None:
+        tables = [pyogrio.read_arrow(p, layer="landuse") for p in paths]
+        # esquema comum (cidades podem ter conjuntos de colunas diferentes)
+        fields = {}
+        for _, table in tables:
+            for field in table.schema:
+                fields.setdefault(field.name, field)
+        geom_types = {meta["geometry_type"] for meta, _ in tables}
+        geometry_type = geom_types.pop() if len(geom_types) == 1 else "Unknown"
+        for i, (meta, table) in enumerate(tables):
+            table = pa.table({name: table[name] if name in table.column_names
+                              else pa.nulls(len(table), field.type)
+                              for name, field in fields.items()},
+                             schema=pa.schema(fields.values()))
+            pyogrio.write_arrow(table, gpkg, layer="landuse", driver="GPKG", append=i > 0,
+                                geometry_name=meta["geometry_name"], crs=meta["crs"],
+                                geometry_type=geometry_type)
+    else:
+        for i, p in enumerate(paths):
+            gpd.read_file(p, layer="landuse", **io_options()).to_file(
+                gpkg, layer="landuse", driver="GPKG", mode="a" if i else "w", **io_options())
+
+    # CSV: concatena o texto quando os cabeçalhos coincidem
+    csv_paths = [os.path.join(OUT_DATA, f"{b}.csv") for b in srcs]
+    headers = []
+    for p in csv_paths:
+        with open(p, "rb") as f:
+            headers.append(f.readline())
+    if len(set(headers)) == 1:
+        with open(csv, "wb") as out:
+            out.write(headers[0])
+            for p in csv_paths:
+                with open(p, "rb") as f:
+                    f.readline()
+                    shutil.copyfileobj(f, out)
+    else:
+        pd.concat([pd.read_csv(p) for p in csv_paths], ignore_index=True).to_csv(csv, index=False)
+
+    # GeoParquet: copia os row groups de cada cidade
+    pq_paths = [os.path.join(OUT_DATA, f"{b}.parquet") for b in srcs]
+    if pq is not None and all(os.path.exists(p) for p in pq_paths):
+        merge_geoparquet(pq_paths, parquet)
+        print(f"  -> {gpkg} | {csv} | {parquet}")
+    else:
+        print(f"  -> {gpkg} | {csv}")
+
+def _layers(gdf_or_list) -> list:
+    """Um GeoDataFrame ou uma lista deles -> lista só com os não vazios."""
+    layers = gdf_or_list if isinstance(gdf_or_list, (list, tuple)) else [gdf_or_list]
+    return [g for g in layers if not g.empty]
+
+def polygon_paths(geoms) -> list:
+    """
+    Um Path composto por feição (todas as partes e anéis), montado em lote:
+    shapely.get_parts/get_rings/get_coordinates dão as coordenadas planas e
+    os índices de anel/parte/feição, e os códigos MOVETO/LINETO/CLOSEPOLY
+    saem das fronteiras entre anéis. Os anéis são orientados antes (externo
+    anti-horário, buracos horário), então os buracos ficam vazados com
+    qualquer regra de preenchimento. Feições vazias viram Path vazio.
+    """
+    geoms = shapely.orient_polygons(np.asarray(geoms, dtype=object))
+    parts, part_feature = shapely.get_parts(geoms, return_index=True)
+    rings, ring_part = shapely.get_rings(parts, return_index=True)
+    coords, coord_ring = shapely.get_coordinates(rings, return_index=True)
+    codes = np.full(len(coords), Path.LINETO, dtype=Path.code_type)
+    if len(coords):
+        first = np.r_[True, coord_ring[1:] != coord_ring[:-1]]
+        codes[first] = Path.MOVETO
+        codes[np.r_[first[1:], True]] = Path.CLOSEPOLY
+    feature = part_feature[ring_part[coord_ring]]
+    cuts = np.searchsorted(feature, np.arange(1, len(geoms)))
+    return [Path(v, c) for v, c in zip(np.split(coords, cuts), np.split(codes, cuts))]
+
+def draw_polygons(ax, paths: list, colors, edgecolor="white", linewidth=0.15) -> PathCollection:
+    """Desenha os Paths de polygon_paths() como uma única PathCollection."""
+    coll = PathCollection(paths, facecolors=list(colors), edgecolors=edgecolor, linewidths=linewidth)
+    ax.add_collection(coll, autolim=True)
+    ax.autoscale_view()
+    return coll
+
+def simplify_for_render(geoms, tolerance: float, cache_dir: str = RENDER_CACHE) -> np.ndarray:
+    """
+    shapely.simplify(preserve_topology=True) com `tolerance` nas unidades do
+    CRS, calculado uma vez por resolução de saída: o resultado fica em
+    cache_dir (WKB em Parquet), chaveado pelo hash das geometrias de
+    entrada e pela tolerância, e limitado a RENDER_CACHE_MAX_BYTES (LRU).
+    """
+    geoms = np.asarray(geoms, dtype=object)
+    if not tolerance or not len(geoms):
+        return geoms
+    digest = hashlib.sha1(repr(float(tolerance)).encode("utf-8"))
+    for wkb in shapely.to_wkb(geoms):
+        digest.update(wkb or b"")
+    cached = os.path.join(cache_dir, f"{digest.hexdigest()}.parquet")
+    if pq is not None and os.path.exists(cached):
+        os.utime(cached)  # marca como usado recentemente (LRU da remoção)
+        return shapely.from_wkb(pq.read_table(cached).column("wkb").to_numpy(zero_copy_only=False))
+
+    t0 = time.perf_counter()
+    out = shapely.simplify(geoms, tolerance, preserve_topology=True)
+    print(f"[simplify] tolerância {tolerance:.3g}: {int(shapely.get_num_coordinates(geoms).sum())} -> "
+          f"{int(shapely.get_num_coordinates(out).sum())} vértices, {time.perf_counter() - t0:.2f}s")
+    if pq is not None:
+        table = pa.table({"wkb": pa.array(shapely.to_wkb(out), pa.binary())})
+        write_cached(cached, lambda tmp: pq.write_table(table, tmp, compression=PARQUET_COMPRESSION),
+                     RENDER_CACHE_MAX_BYTES)
+    return out
+
+def plot_matplotlib(gdf, title: str, out_png: str):
+    """
+    Desenha um GeoDataFrame, ou uma lista deles (ex.: as camadas por cidade,
+    na mesma figura, sem concatená-las). As geometrias são simplificadas
+    para RENDER_SIMPLIFY_PX pixels da figura (ver simplify_for_render).
+    """
+    layers = _layers(gdf)
+    if not layers:
         print(f"[plot] {title}: empty, skip")
         return
-    fig, ax = plt.subplots(figsize=(10,10))
+    # tamanho de um pixel em unidades do CRS: a maior dimensão (em lon/lat,
+    # com x encolhido pela latitude média, como no aspecto abaixo) ocupa a figura
+    minx, miny = np.min([g.total_bounds[:2] for g in layers], axis=0)
+    maxx, maxy = np.max([g.total_bounds[2:] for g in layers], axis=0)
+    geographic = layers[0].crs is not None and layers[0].crs.is_geographic
+    shrink = np.cos(np.deg2rad((miny + maxy) / 2)) if geographic else 1.0
+    pixel = max((maxx - minx) * shrink, maxy - miny) / (MAP_SIZE_IN * MAP_DPI)
+
+    fig, ax = plt.subplots(figsize=(MAP_SIZE_IN, MAP_SIZE_IN))
     # contorno fininho branco ajuda a leitura em áreas densas
-    gdf.plot(ax=ax, color=gdf["fill"], edgecolor="white", linewidth=0.15)
+    for layer in layers:
+        geoms = simplify_for_render(layer.geometry.array, RENDER_SIMPLIFY_PX * pixel)
+        draw_polygons(ax, polygon_paths(geoms), layer["fill"])
+    # mesmo aspecto do GeoDataFrame.plot: em lon/lat, corrige pela latitude média
+    if geographic:
+        y0, y1 = ax.get_ylim()
+        ax.set_aspect(1 / np.cos(np.deg2rad((y0 + y1) / 2)))
+    else:
+        ax.set_aspect("equal")
     ax.set_title(title, fontsize=12)
     ax.set_axis_off()
     plt.tight_layout()
-    plt.savefig(out_png, dpi=220)
+    plt.savefig(out_png, dpi=MAP_DPI)
     plt.close(fig)
     print(f"  -> {out_png}")
 
+def _union_chunk(geoms: np.ndarray):
+    """União de um bloco (classe x célula da grade); inválidos são reparados antes."""
+    bad = ~shapely.is_valid(geoms)
+    if bad.any():
+        geoms = geoms.copy()
+        geoms[bad] = shapely.make_valid(geoms[bad])
+    return shapely.union_all(geoms)
+
+def dissolve_by_fill(gdf_or_list, workers: int = 1, cache_dir: str = DISSOLVE_CACHE) -> gpd.GeoDataFrame:
+    """
+    Une os polígonos vizinhos de mesma cor (`fill`): uma linha por classe,
+    com sector/intensity da classe e a geometria dissolvida. Cada classe é
+    dividida numa grade de DISSOLVE_CHUNKS x DISSOLVE_CHUNKS blocos (pelo
+    centro do bbox de cada feição); os blocos são unidos em paralelo e só
+    então unidos entre si. O resultado é guardado em cache_dir como
+    GeoParquet, chaveado por um hash das geometrias e cores de entrada, e
+    limitado a DISSOLVE_CACHE_MAX_BYTES (LRU).
+    """
+    layers = _layers(gdf_or_list)
+    crs = layers[0].crs if layers else None
+    if not layers:
+        return gpd.GeoDataFrame({"fill": [], "sector": [], "intensity": []}, geometry=[], crs=crs)
+    geoms = np.concatenate([np.asarray(g.geometry.array, dtype=object) for g in layers])
+    fills = np.concatenate([np.asarray(g["fill"], dtype=object) for g in layers])
+    sectors = np.concatenate([np.asarray(g["sector"], dtype=object) for g in layers])
+    intensities = np.concatenate([np.asarray(g["intensity"], dtype=object) for g in layers])
+
+    digest = hashlib.sha1(f"{DISSOLVE_CHUNKS}/{crs}".encode("utf-8"))
+    for wkb, fill in zip(shapely.to_wkb(geoms), fills):
+        digest.update(wkb + str(fill).encode("utf-8"))
+    cached = os.path.join(cache_dir, f"{digest.hexdigest()}.parquet")
+    if pq is not None and os.path.exists(cached):
+        print(f"[dissolve] cache: {cached}")
+        os.utime(cached)  # marca como usado recentemente (LRU da remoção)
+        return gpd.read_parquet(cached)
+
+    t0 = time.perf_counter()
+    bounds = shapely.bounds(geoms)
+    cx, cy = (bounds[:, 0] + bounds[:, 2]) / 2, (bounds[:, 1] + bounds[:, 3]) / 2
+
+    def cell(v):
+        """Célula da grade de blocos (0 .. DISSOLVE_CHUNKS - 1) de cada coordenada."""
+        return np.minimum(((v - v.min()) / (np.ptp(v) or 1) * DISSOLVE_CHUNKS).astype(int),
+                          DISSOLVE_CHUNKS - 1)
+
+    classes = [f for f in FILLS if (fills == f).any()]
+    code = pd.Categorical(fills, categories=classes).codes.astype(np.int64)
+    key = (code * DISSOLVE_CHUNKS + cell(cx)) * DISSOLVE_CHUNKS + cell(cy)
+    order = np.argsort(key, kind="stable")
+    chunk_keys, starts = np.unique(key[order], return_index=True)
+    chunks = np.split(geoms[order], starts[1:])
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parts = np.array(list(pool.map(_union_chunk, chunks)), dtype=object)
+    else:
+        parts = np.array([_union_chunk(c) for c in chunks], dtype=object)
+
+    rows = []
+    chunk_class = chunk_keys // DISSOLVE_CHUNKS**2
+    for i, fill in enumerate(classes):
+        first = int(np.flatnonzero(code == i)[0])
+        rows.append((fill, sectors[first], intensities[first],
+                     shapely.union_all(parts[chunk_class == i])))
+    out = gpd.GeoDataFrame(pd.DataFrame(rows, columns=["fill", "sector", "intensity", "geometry"]),
+                           geometry="geometry", crs=crs)
+    print(f"[dissolve] {len(geoms)} polígonos -> {len(out)} classes "
+          f"({int(shapely.get_num_geometries(out.geometry.array).sum())} partes), "
+          f"{len(chunks)} blocos, {time.perf_counter() - t0:.2f}s")
+    if pq is not None:
+        write_cached(cached, lambda tmp: out.to_parquet(tmp, compression=PARQUET_COMPRESSION),
+                     DISSOLVE_CACHE_MAX_BYTES)
+    return out
+
+def tile_bounds(z: int, x: int, y: int) -> tuple:
+    """Limites (minx, miny, maxx, maxy) do tile z/x/y em EPSG:3857."""
+    size = 2 * WEB_MERCATOR_HALF / 2**z
+    minx, maxy = -WEB_MERCATOR_HALF + x * size, WEB_MERCATOR_HALF - y * size
+    return minx, maxy - size, minx + size, maxy
+
+def tiles_for_bounds(bounds, z: int) -> list:
+    """Tiles (z, x, y) do zoom z que cobrem `bounds` (EPSG:3857)."""
+    size = 2 * WEB_MERCATOR_HALF / 2**z
+    last = 2**z - 1
+    x0, x1 = (min(max(int((b + WEB_MERCATOR_HALF) // size), 0), last) for b in (bounds[0], bounds[2]))
+    y0, y1 = (min(max(int((WEB_MERCATOR_HALF - b) // size), 0), last) for b in (bounds[3], bounds[1]))
+    return [(z, x, y) for x in range(x0, x1 + 1) for y in range(y0, y1 + 1)]
+
+def _tile_features(geoms: np.ndarray, zooms) -> tuple:
+    """
+    Para cada tile dos zooms que cobre `geoms` (EPSG:3857), os índices das
+    feições que o tocam, via uma única consulta em lote a um STRtree.
+    Retorna ([((z, x, y), índices)], total de tiles examinados); tiles sem
+    feições ficam de fora.
+    """
+    tree = shapely.STRtree(geoms)
+    bounds = shapely.total_bounds(geoms)
+    tiles = [t for z in range(zooms[0], zooms[1] + 1) for t in tiles_for_bounds(bounds, z)]
+    boxes = shapely.box(*np.array([tile_bounds(*t) for t in tiles]).T)
+    tile_i, geom_i = tree.query(boxes, predicate="intersects")
+    order = np.lexsort((geom_i, tile_i))
+    tile_i, geom_i = tile_i[order], geom_i[order]
+    starts = np.flatnonzero(np.r_[True, tile_i[1:] != tile_i[:-1]]) if len(tile_i) else []
+    return [(tiles[i], idx) for i, idx in zip(tile_i[starts], np.split(geom_i, starts[1:]))], len(tiles)
+
+_TILE_LAYER = None  # ({zoom: Paths em EPSG:3857}, cores) nos processos de render
+
+def _init_tile_worker(zoom_geoms: dict, fills: np.ndarray):
+    """Converte as feições em Paths uma vez por zoom e processo; os tiles só indexam."""
+    global _TILE_LAYER
+    _TILE_LAYER = ({z: polygon_paths(g) for z, g in zoom_geoms.items()}, fills)
+
+def _render_tile(task) -> str:
+    """Desenha um tile (z, x, y, índices das feições, arquivo) em PNG transparente."""
+    z, x, y, idx, out_png = task
+    paths, fills = _TILE_LAYER
+    minx, miny, maxx, maxy = tile_bounds(z, x, y)
+    # Figure fora do pyplot: sem redesenho a cada artista adicionado, só no savefig
+    fig = Figure(figsize=(1, 1), dpi=TILE_SIZE)
+    ax = fig.add_axes([0, 0, 1, 1])
+    ax.set_axis_off()
+    draw_polygons(ax, [paths[z][i] for i in idx], fills[idx])
+    ax.set_xlim(minx, maxx)
+    ax.set_ylim(miny, maxy)
+    ax.set_aspect("auto")
+    os.makedirs(os.path.dirname(out_png), exist_ok=True)
+    # sem metadado "Software" (versão do matplotlib): mesmo PNG a cada execução
+    fig.savefig(out_png, dpi=TILE_SIZE, transparent=True, metadata={"Software": None})
+    return out_png
+
+def render_tiles(gdf_or_list, out_dir: str, zooms=TILE_ZOOMS, workers: int = 1) -> int:
+    """
+    Renderiza a camada enriquecida (ou uma lista delas) numa pirâmide XYZ
+    out_dir/{z}/{x}/{y}.png, com as mesmas cores `fill` dos mapas. Um
+    STRtree escolhe as feições que tocam cada tile; tiles vazios não são
+    gravados. Com workers > 1, os tiles são divididos entre processos.
+    A saída não depende da ordem de execução. Retorna quantos tiles gravou.
+    """
+    layers = _layers(gdf_or_list)
+    if not layers:
+        print(f"[tiles] {out_dir}: empty, skip")
+        return 0
+    geoms = np.concatenate([np.asarray(g.geometry.to_crs(3857).array, dtype=object) for g in layers])
+    fills = np.concatenate([np.asarray(g["fill"], dtype=object) for g in layers])
+    found, n_tiles = _tile_features(geoms, zooms)
+    tasks = [(z, x, y, idx, os.path.join(out_dir, str(z), str(x), f"{y}.png"))
+             for (z, x, y), idx in found]
+    # simplificação por zoom, para RENDER_SIMPLIFY_PX pixels do tile
+    zoom_geoms = {z: simplify_for_render(geoms, RENDER_SIMPLIFY_PX * 2 * WEB_MERCATOR_HALF
+                                         / 2**z / TILE_SIZE)
+                  for z in range(zooms[0], zooms[1] + 1)}
+
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_tile_worker,
+                                 initargs=(zoom_geoms, fills)) as pool:
+            for _ in pool.map(_render_tile, tasks, chunksize=16):
+                pass
+    else:
+        _init_tile_worker(zoom_geoms, fills)
+        for task in tasks:
+            _render_tile(task)
+    print(f"[tiles] z{zooms[0]}-{zooms[1]}: {len(tasks)} tiles, "
+          f"{n_tiles - len(tasks)} vazios pulados -> {out_dir}")
+    return len(tasks)
+
+# ---------------------------------------------------------------------
+# VECTOR TILES (MVT em MBTiles)
+# ---------------------------------------------------------------------
+def _varints(values) -> bytes:
+    """Inteiros não negativos -> varints do protobuf, concatenados."""
+    out = bytearray()
+    for v in values:
+        v = int(v)
+        while v > 0x7F:
+            out.append((v & 0x7F) | 0x80)
+            v >>= 7
+        out.append(v)
+    return bytes(out)
+
+def _pb(field: int, payload) -> bytes:
+    """Campo protobuf: int -> varint; bytes/str -> length-delimited."""
+    if isinstance(payload, int):
+        return _varints([field << 3, payload])
+    if isinstance(payload, str):
+        payload = payload.encode("utf-8")
+    return _varints([field << 3 | 2, len(payload)]) + payload
+
+def _mvt_value(v) -> bytes:
+    """Value do MVT: texto (1), inteiro com sinal (6, zigzag) ou double (3)."""
+    if isinstance(v, str):
+        return _pb(1, v)
+    if float(v).is_integer():
+        v = int(v)
+        return _pb(6, (v << 1) ^ (v >> 63))
+    return _varints([3 << 3 | 1]) + np.float64(v).tobytes()
+
+def _mvt_polygon_commands(polys: list) -> list:
+    """
+    Polígonos em coordenadas inteiras do tile -> comandos de geometria do
+    MVT (MoveTo/LineTo/ClosePath, deltas em zigzag a partir do cursor).
+    """
+    cmds, cursor = [], np.zeros(2, dtype=np.int64)
+    for poly in polys:
+        for ring in [poly.exterior, *poly.interiors]:
+            xy = shapely.get_coordinates(ring).astype(np.int64)[:-1]
+            if len(xy) < 3:
+                continue
+            delta = np.diff(np.vstack([cursor, xy]), axis=0)
+            cursor = xy[-1]
+            zz = ((delta << 1) ^ (delta >> 63)).ravel()
+            cmds.append(np.r_[1 | 1 << 3, zz[:2], 2 | (len(xy) - 1) << 3, zz[2:], 7 | 1 << 3])
+    return list(np.concatenate(cmds)) if cmds else []
+
+def _tile_polygons(geom) -> list:
+    """Partes poligonais de uma geometria recortada (pode vir coleção/linha)."""
+    if geom is None or geom.is_empty:
+        return []
+    if geom.geom_type == "Polygon":
+        return [geom]
+    if geom.geom_type in ("MultiPolygon", "GeometryCollection"):
+        return [p for part in shapely.get_parts(geom) for p in _tile_polygons(part)]
+    return []
+
+_MVT_LAYER = None  # ({zoom: geometrias simplificadas}, atributos) nos processos
+
+def _init_mvt_worker(simplified: dict, attrs: list):
+    global _MVT_LAYER
+    _MVT_LAYER = (simplified, attrs)
+
+def _encode_mvt_tile(task) -> tuple:
+    """
+    Recorta (com borda MVT_BUFFER), leva para a grade inteira MVT_EXTENT do
+    tile e codifica as feições (z, x, y, índices) numa camada MVT. Retorna
+    (z, x, y, bytes do tile em gzip), com None se nada sobrou no tile.
+    """
+    z, x, y, idx = task
+    simplified, attrs = _MVT_LAYER
+    minx, miny, maxx, maxy = tile_bounds(z, x, y)
+    scale = MVT_EXTENT / (maxx - minx)
+    pad = MVT_BUFFER / scale
+    clipped = shapely.clip_by_rect(simplified[z][idx], minx - pad, miny - pad, maxx + pad, maxy + pad)
+    # y do tile cresce para baixo; anel externo com área positiva nessa grade
+    local = shapely.transform(clipped, lambda c: np.column_stack(((c[:, 0] - minx) * scale,
+                                                                  (maxy - c[:, 1]) * scale)))
+    local = shapely.orient_polygons(shapely.set_precision(local, 1.0))
+
+    keys = list(MVT_FIELDS)
+    values, value_ids, features = [], {}, []
+    for i, geom in zip(idx, local):
+        cmds = _mvt_polygon_commands(_tile_polygons(geom))
+        if not cmds:
+            continue
+        tags = []
+        for k, v in enumerate(attrs[i]):
+            if v is None:
+                continue
+            if v not in value_ids:
+                value_ids[v] = len(values)
+                values.append(v)
+            tags += [k, value_ids[v]]
+        features.append(_pb(1, int(i)) + _pb(2, _varints(tags)) + _pb(3, 3) + _pb(4, _varints(cmds)))
+    if not features:
+        return z, x, y, None
+    layer = (_pb(15, 2) + _pb(1, MVT_LAYER) + b"".join(_pb(2, f) for f in features)
+             + b"".join(_pb(3, k) for k in keys) + b"".join(_pb(4, _mvt_value(v)) for v in values)
+             + _pb(5, MVT_EXTENT))
+    return z, x, y, gzip.compress(_pb(3, layer), mtime=0)
+
+def write_mbtiles(gdf_or_list, path: str, zooms=TILE_ZOOMS, workers: int = 1) -> int:
+    """
+    Exporta a camada enriquecida (ou uma lista delas) como vector tiles
+    (MVT, camada MVT_LAYER com sector/intensity/fill) num arquivo MBTiles.
+    Por zoom, as geometrias são simplificadas para a resolução da grade do
+    tile e recortadas por tile; a codificação é dividida entre processos.
+    Cada tile guarda um digest das feições que o compõem: numa nova
+    execução, só os tiles cujo digest mudou são recodificados e os que
+    deixaram de existir são removidos. Retorna quantos tiles codificou.
+    """
+    layers = _layers(gdf_or_list)
+    if not layers:
+        print(f"[mvt] {path}: empty, skip")
+        return 0
+    geoms = np.concatenate([np.asarray(g.geometry.to_crs(3857).array, dtype=object) for g in layers])
+    cols = {f: np.concatenate([np.asarray(g[f], dtype=object) for g in layers]) for f in MVT_FIELDS}
+    attrs = [tuple(None if pd.isna(v) else v for v in row) for row in zip(*cols.values())]
+
+    simplified, feature_digests = {}, {}
+    for z in range(zooms[0], zooms[1] + 1):
+        tolerance = 2 * WEB_MERCATOR_HALF / 2**z / MVT_EXTENT  # uma unidade da grade
+        simplified[z] = simplify_for_render(geoms, tolerance)
+        feature_digests[z] = [hashlib.sha1(wkb + repr((i, a)).encode("utf-8")).digest()
+                              for i, (wkb, a) in enumerate(zip(shapely.to_wkb(simplified[z]), attrs))]
+    found, _ = _tile_features(geoms, zooms)
+    params = f"{MVT_ENCODER_VERSION}/{MVT_EXTENT}/{MVT_BUFFER}/{MVT_LAYER}".encode("utf-8")
+    digests = {(z, x, y): hashlib.sha1(params + b"".join(feature_digests[z][i] for i in idx)).hexdigest()
+               for (z, x, y), idx in found}
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    db = sqlite3.connect(path)
+    try:
+        db.executescript("""
+            CREATE TABLE IF NOT EXISTS metadata (name TEXT PRIMARY KEY, value TEXT);
+            CREATE TABLE IF NOT EXISTS tiles (zoom_level INTEGER, tile_column INTEGER,
+                                              tile_row INTEGER, tile_data BLOB);
+            CREATE UNIQUE INDEX IF NOT EXISTS tile_index ON tiles (zoom_level, tile_column, tile_row);
+            CREATE TABLE IF NOT EXISTS tile_digests (zoom_level INTEGER, tile_column INTEGER,
+                                                     tile_row INTEGER, digest TEXT,
+                                                     PRIMARY KEY (zoom_level, tile_column, tile_row));
+        """)
+        # MBTiles usa linhas TMS (y cresce para o norte)
+        old = {(z, x, 2**z - 1 - row): d for z, x, row, d in db.execute("SELECT * FROM tile_digests")}
+        stale = [k for k in old if k not in digests]
+        tasks = [(z, x, y, idx) for (z, x, y), idx in found if old.get((z, x, y)) != digests[(z, x, y)]]
+
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_mvt_worker,
+                                     initargs=(simplified, attrs)) as pool:
+                encoded = list(pool.map(_encode_mvt_tile, tasks, chunksize=16))
+        else:
+            _init_mvt_worker(simplified, attrs)
+            encoded = [_encode_mvt_tile(t) for t in tasks]
+
+        rows = [(z, x, 2**z - 1 - y) for z, x, y in stale]
+        rows += [(z, x, 2**z - 1 - y) for z, x, y, data in encoded if data is None]
+        db.executemany("DELETE FROM tiles WHERE zoom_level=? AND tile_column=? AND tile_row=?", rows)
+        db.executemany("DELETE FROM tile_digests WHERE zoom_level=? AND tile_column=? AND tile_row=?",
+                       [(z, x, 2**z - 1 - y) for z, x, y in stale])
+        db.executemany("INSERT OR REPLACE INTO tiles VALUES (?, ?, ?, ?)",
+                       [(z, x, 2**z - 1 - y, data) for z, x, y, data in encoded if data is not None])
+        db.executemany("INSERT OR REPLACE INTO tile_digests VALUES (?, ?, ?, ?)",
+                       [(z, x, 2**z - 1 - y, digests[(z, x, y)]) for z, x, y, _ in encoded])
+
+        lon0, lat0, lon1, lat1 = shapely.total_bounds(np.concatenate(
+            [np.asarray(g.geometry.to_crs(4326).array, dtype=object) for g in layers]))
+        fields = {"sector": "String", "intensity": "Number", "fill": "String"}
+        db.executemany("INSERT OR REPLACE INTO metadata VALUES (?, ?)", [
+            ("name", os.path.splitext(os.path.basename(path))[0]),
+            ("format", "pbf"),
+            ("minzoom", str(zooms[0])), ("maxzoom", str(zooms[1])),
+            ("bounds", f"{lon0:.6f},{lat0:.6f},{lon1:.6f},{lat1:.6f}"),
+            ("center", f"{(lon0 + lon1) / 2:.6f},{(lat0 + lat1) / 2:.6f},{zooms[0]}"),
+            ("json", json.dumps({"vector_layers": [{
+                "id": MVT_LAYER, "fields": {f: fields.get(f, "String") for f in MVT_FIELDS},
+                "minzoom": zooms[0], "maxzoom": zooms[1]}]})),
+        ])
+        db.commit()
+    finally:
+        db.close()
+    print(f"[mvt] z{zooms[0]}-{zooms[1]}: {len(digests)} tiles ({len(tasks)} codificados, "
+          f"{len(digests) - len(tasks)} sem mudança, {len(stale)} removidos) -> {path}")
+    return len(tasks)
+
 # ---------------------------------------------------------------------
 # PIPELINE
 # ---------------------------------------------------------------------
-def process_city(city: str, url: str) -> gpd.GeoDataFrame:
-    gdf = load_landuse_from_github(url, GPKG_LAYER_NAME)
+def city_base(city: str) -> str:
+    return f"landuse__{slug(city)}"
+
+def process_city(city: str, url: str, cache: ClassificationCache = None) -> gpd.GeoDataFrame:
+    gdf = quantize(load_landuse_from_github(url, GPKG_LAYER_NAME), QUANTIZE_GRID)
     gdf["city"] = city
-    gdf = enrich(gdf)
-    base = f"landuse__{slug(city)}"
+    gdf = enrich(gdf, cache)
+    base = city_base(city)
     save_outputs(gdf, base)
     plot_matplotlib(gdf, f"Industrial & Service Land Use Intensity – {city}",
                     os.path.join(OUT_MAPS, f"{base}.png"))
     return gdf
 
-def main():
-    all_gdfs = []
-    for city, url in LANDUSE_URLS.items():
-        g = process_city(city, url)
-        if not g.empty:
-            all_gdfs.append(g)
+def _frame_to_ipc(gdf: gpd.GeoDataFrame) -> bytes:
+    """Serializa um GeoDataFrame como stream Arrow IPC (geometria em WKB)."""
+    table = pa.table(gdf.to_arrow(index=False, geometry_encoding="WKB"))
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+def _frame_from_ipc(buf: bytes) -> gpd.GeoDataFrame:
+    return gpd.GeoDataFrame.from_arrow(pa.ipc.open_stream(buf).read_all())
+
+def _process_city_worker(city: str, url: str):
+    """
+    process_city() em um processo do pool. Cada processo abre o cache
+    persistente; o resultado volta como Arrow IPC (ou o próprio GeoDataFrame,
+    via pickle, se pyarrow não estiver instalado).
+    """
+    cache = PersistentClassificationCache()
+    try:
+        gdf = process_city(city, url, cache)
+        print(f"[cache] {city}: {cache}")
+    finally:
+        cache.close()
+    return _frame_to_ipc(gdf) if pa is not None else gdf
+
+def set_io_engine(engine: str):
+    global IO_ENGINE
+    IO_ENGINE = engine
+
+def set_quantize_grid(grid: float):
+    global QUANTIZE_GRID
+    QUANTIZE_GRID = grid
+
+def set_render_simplify(px: float):
+    global RENDER_SIMPLIFY_PX
+    RENDER_SIMPLIFY_PX = px
+
+def _init_worker(engine: str, grid: float, simplify_px: float = RENDER_SIMPLIFY_PX):
+    set_io_engine(engine)
+    set_quantize_grid(grid)
+    set_render_simplify(simplify_px)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=1,
+                        help="processos para rodar as cidades em paralelo (padrão: 1)")
+    parser.add_argument("--io-engine", choices=["arrow", "pyogrio", "fiona"], default=IO_ENGINE,
+                        help=f"backend de leitura/escrita GPKG (padrão: {IO_ENGINE})")
+    parser.add_argument("--grid", type=float, default=QUANTIZE_GRID,
+                        help=f"grade das coordenadas, em graus; 0 desativa (padrão: {QUANTIZE_GRID:g})")
+    parser.add_argument("--tiles", metavar="ZMIN-ZMAX",
+                        help="também gera tiles XYZ da camada combinada em ./"
+                             f"{OUT_TILES} (ex.: {TILE_ZOOMS[0]}-{TILE_ZOOMS[1]})")
+    parser.add_argument("--simplify-px", type=float, default=RENDER_SIMPLIFY_PX,
+                        help="simplificação para desenho, em pixels da saída; 0 desativa "
+                             f"(padrão: {RENDER_SIMPLIFY_PX:g})")
+    parser.add_argument("--dissolve", action="store_true",
+                        help="mapa/tiles da camada combinada desenhados a partir dos polígonos "
+                             "dissolvidos por cor (com cache em ./" + DISSOLVE_CACHE + ")")
+    parser.add_argument("--mvt", metavar="ZMIN-ZMAX",
+                        help=f"também exporta vector tiles (MBTiles) da camada combinada em ./{OUT_TILES}")
+    args = parser.parse_args(argv)
+    _init_worker(args.io_engine, args.grid, args.simplify_px)
+
+    all_gdfs = {}
+    if args.workers > 1:
+        with ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker,
+                                 initargs=(args.io_engine, args.grid, args.simplify_px)) as pool:
+            results = pool.map(_process_city_worker, LANDUSE_URLS.keys(), LANDUSE_URLS.values())
+            for city, res in zip(LANDUSE_URLS, results):
+                g = _frame_from_ipc(res) if pa is not None else res
+                if not g.empty:
+                    all_gdfs[city] = g
+    else:
+        cache = PersistentClassificationCache()  # um só cache (e conexão) para as cidades
+        for city, url in LANDUSE_URLS.items():
+            g = process_city(city, url, cache)
+            cache.flush()
+            if not g.empty:
+                all_gdfs[city] = g
+        print(f"[cache] {cache} (city faz parte da assinatura: sem acertos entre cidades)")
+        cache.close()
 
-    # Merge (Vancouver + North Vancouver)
+    # Merge (Vancouver + North Vancouver): reaproveita as saídas por cidade
     if all_gdfs:
-        all_ = gpd.GeoDataFrame(pd.concat(all_gdfs, ignore_index=True), crs=4326)
         base = "landuse__vancouver__north_vancouver"
-        save_outputs(all_, base)
-        plot_matplotlib(all_, "Industrial & Service Land Use Intensity – Vancouver + North Vancouver",
+        merge_outputs([city_base(city) for city in all_gdfs], base)
+        layers = list(all_gdfs.values())
+        if args.dissolve:
+            # uma linha por cor para o mapa; para tiles, partes separadas (o
+            # índice espacial continua escolhendo só o que toca cada tile)
+            layers = dissolve_by_fill(layers, args.workers)
+        plot_matplotlib(layers,
+                        "Industrial & Service Land Use Intensity – Vancouver + North Vancouver",
                         os.path.join(OUT_MAPS, f"{base}.png"))
+        if args.dissolve:
+            layers = layers.explode(index_parts=False).reset_index(drop=True)
+        if args.tiles:
+            zmin, _, zmax = args.tiles.partition("-")
+            render_tiles(layers, os.path.join(OUT_TILES, base),
+                         (int(zmin), int(zmax or zmin)), args.workers)
+        if args.mvt:
+            zmin, _, zmax = args.mvt.partition("-")
+            write_mbtiles(layers, os.path.join(OUT_TILES, f"{base}.mbtiles"),
+                          (int(zmin), int(zmax or zmin)), args.workers)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,139 @@
+"""
+landuse_common.py
+
+Funções compartilhadas por industrial_service_landuse_map.py e
+export_landuse_buildings.py (importadas pelos dois scripts; manter aqui uma
+única implementação).
+"""
+
+import json
+import time
+import numpy as np
+import pandas as pd
+import geopandas as gpd
+import shapely
+
+try:  # opcional no mapa (sem pyarrow, não há saída GeoParquet)
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+# GeoParquet: compressão, linhas por row group e colunas de bbox ("covering")
+# para filtros por predicado nos leitores
+PARQUET_COMPRESSION = "zstd"
+PARQUET_ROW_GROUP_SIZE = 50_000
+
+
+def quantize(gdf: gpd.GeoDataFrame, grid: float) -> gpd.GeoDataFrame:
+    """
+    Ajusta as coordenadas à grade `grid` (unidades do CRS) com
+    shapely.set_precision, em lote; 0/None não altera nada. O ajuste é ponto
+    a ponto (bem mais rápido que o modo "valid_output", que refaz a
+    topologia de tudo); só o que ficar inválido é reparado com make_valid, e
+    polígonos que colapsarem (vazios ou sem área) são descartados.
+    """
+    if not grid or gdf.empty:
+        return gdf
+    t0 = time.perf_counter()
+    geoms = np.asarray(gdf.geometry.array, dtype=object)
+    out = shapely.set_precision(geoms, grid, mode="pointwise")
+    bad = ~shapely.is_valid(out) & ~shapely.is_missing(out)
+    # polígonos continuam polígonos: o reparo "structure" não devolve
+    # GeometryCollection com sobras de linha
+    polygonal = np.isin(shapely.get_type_id(geoms), [3, 6])
+    for mask, kwargs in ((bad & polygonal, {"method": "structure", "keep_collapsed": False}),
+                         (bad & ~polygonal, {})):
+        if mask.any():
+            out[mask] = shapely.make_valid(out[mask], **kwargs)
+    collapsed = ~shapely.is_empty(geoms) & (shapely.is_empty(out)
+                                            | (polygonal & (shapely.area(out) == 0)))
+    before = int(shapely.get_num_coordinates(geoms).sum())
+    after = int(shapely.get_num_coordinates(out[~collapsed]).sum())
+    gdf = gdf.copy()
+    gdf[gdf.geometry.name] = gpd.GeoSeries(out, index=gdf.index, crs=gdf.crs)
+    gdf = gdf[~collapsed]
+    print(f"  [quantize] grade {grid:g}: {before} -> {after} vértices, "
+          f"{int(bad.sum())} reparadas, {int(collapsed.sum())} descartadas, {time.perf_counter() - t0:.2f}s")
+    return gdf
+
+
+def to_geoparquet(gdf: gpd.GeoDataFrame, path: str):
+    """
+    Grava GeoParquet em EPSG:4326 (zstd, row groups de PARQUET_ROW_GROUP_SIZE,
+    bbox covering). Colunas com tipos mistos (ex.: height numérico e textual)
+    viram texto.
+    """
+    if gdf.crs is None or int(gdf.crs.to_epsg() or 4326) != 4326:
+        gdf = gdf.to_crs(4326)
+    mixed = [c for c in gdf.columns if c != gdf.geometry.name and gdf[c].dtype == object
+             and pd.api.types.infer_dtype(gdf[c], skipna=True).startswith("mixed")]
+    if mixed:
+        gdf = gdf.copy()
+        for c in mixed:
+            gdf[c] = gdf[c].where(gdf[c].isna(), gdf[c].astype(str))
+    gdf.to_parquet(path, index=False, compression=PARQUET_COMPRESSION,
+                   row_group_size=PARQUET_ROW_GROUP_SIZE, write_covering_bbox=True)
+
+
+def first_seen(elements, ids, seen: set) -> np.ndarray:
+    """Máscara das feições (element, id) ainda não vistas; atualiza `seen`."""
+    keep = np.zeros(len(ids), dtype=bool)
+    for i, key in enumerate(zip(elements, ids)):
+        if key not in seen:
+            seen.add(key)
+            keep[i] = True
+    return keep
+
+
+def _union_schema(schemas: list) -> "pa.Schema":
+    """União dos esquemas; colunas com tipos conflitantes viram texto."""
+    types = {}
+    for schema in schemas:
+        for field in schema:
+            types.setdefault(field.name, set()).add(field.type)
+    fields = []
+    for name, found in types.items():
+        found.discard(pa.null())
+        typ = found.pop() if len(found) == 1 else (pa.string() if found else pa.null())
+        fields.append(pa.field(name, typ))
+    return pa.schema(fields)
+
+
+def merge_geoparquet(paths: list, out: str) -> int:
+    """
+    Junta arquivos GeoParquet em `out` lendo um row group por vez, sem
+    decodificar geometrias. O esquema é a união dos esquemas (colunas
+    ausentes viram nulos) e o metadado "geo" passa a cobrir todos os arquivos
+    (bbox e tipos de geometria). Se houver colunas element/id, feições OSM
+    repetidas são descartadas. Retorna quantas linhas foram descartadas.
+    """
+    files = [pq.ParquetFile(p) for p in paths]
+    schema = _union_schema([f.schema_arrow for f in files])
+    dedup = "element" in schema.names and "id" in schema.names
+
+    metas = [json.loads(f.schema_arrow.metadata[b"geo"]) for f in files]
+    geo = metas[0]
+    for name, col in geo["columns"].items():
+        cols = [m["columns"][name] for m in metas]
+        col["geometry_types"] = sorted({t for c in cols for t in c.get("geometry_types", [])})
+        boxes = [c.get("bbox") for c in cols]
+        if all(boxes):
+            col["bbox"] = [min(b[0] for b in boxes), min(b[1] for b in boxes),
+                           max(b[2] for b in boxes), max(b[3] for b in boxes)]
+    schema = schema.with_metadata({b"geo": json.dumps(geo).encode("utf-8")})
+
+    seen, dropped = set(), 0
+    with pq.ParquetWriter(out, schema, compression=PARQUET_COMPRESSION) as writer:
+        for f in files:
+            for i in range(f.num_row_groups):
+                table = f.read_row_group(i)
+                if dedup and "element" in table.column_names and "id" in table.column_names:
+                    keep = first_seen(table["element"].to_pylist(), table["id"].to_pylist(), seen)
+                    dropped += int((~keep).sum())
+                    table = table.filter(pa.array(keep))
+                arrays = [table[field.name].cast(field.type) if field.name in table.column_names
+                          else pa.nulls(table.num_rows, field.type) for field in schema]
+                writer.write_table(pa.Table.from_arrays(arrays, schema=schema),
+                                   row_group_size=PARQUET_ROW_GROUP_SIZE)
+    return dropped
@@ -0,0 +1,6 @@
+import os
+import sys
+
+# os scripts ficam na raiz do repositório, fora de um pacote
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
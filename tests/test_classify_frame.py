@@ -0,0 +1,49 @@
+"""classify_frame()/classify_frame_cached() devem dar o mesmo resultado de classify()."""
+import os
+from glob import glob
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import pytest
+
+import industrial_service_landuse_map as m
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data")
+GPKGS = sorted(glob(os.path.join(DATA_DIR, "landuse__*.gpkg"))) + [
+    os.path.join(DATA_DIR, "buildings__city_of_north_vancouver_british_columbia_canada.gpkg"),
+]
+
+
+def expected(frame: pd.DataFrame) -> list:
+    return [m.classify(row) for _, row in frame.iterrows()]
+
+
+def as_pairs(sector, intensity) -> list:
+    """(setor, intensidade) por linha, com nulos como (None, None), igual a classify()."""
+    return [(s, None if pd.isna(i) else int(i)) for s, i in zip(sector, intensity)]
+
+
+def assert_parity(frame: pd.DataFrame):
+    want = expected(frame)
+    assert as_pairs(*m.classify_frame(frame)) == want
+    cache = m.ClassificationCache()
+    assert as_pairs(*m.classify_frame_cached(frame, cache)) == want
+    # segunda passada: tudo vem do cache
+    assert as_pairs(*m.classify_frame_cached(frame, cache)) == want
+    assert cache.misses == cache.hits
+
+
+@pytest.mark.parametrize("path", GPKGS, ids=os.path.basename)
+def test_bundled_gpkg(path):
+    assert_parity(gpd.read_file(path))
+
+
+def test_null_landuse_and_fallback():
+    frame = pd.DataFrame({
+        "landuse": [np.nan, np.nan, "Industrial", "commercial", "retail", None],
+        "name": ["Depot", None, None, np.nan, ["Office", None], "warehouse"],
+        "geometry": [None] * 6,
+    })
+    assert_parity(frame)
+    assert m.classify(frame.iloc[1]) == (None, None)
@@ -0,0 +1,101 @@
+"""DownloadCache contra um http.server local (200, 304, troca, remoção, sem rede)."""
+import functools
+import os
+import threading
+import time
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import industrial_service_landuse_map as m
+
+
+class Handler(SimpleHTTPRequestHandler):
+    """Serve o diretório dado; anota os códigos e responde 503 se `fail`."""
+
+    codes = []
+    fail = False
+
+    def do_GET(self):
+        if Handler.fail:
+            self.send_error(503)
+        else:
+            super().do_GET()
+
+    def log_request(self, code="-", size="-"):
+        Handler.codes.append(int(code))
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server(tmp_path):
+    root = tmp_path / "www"
+    root.mkdir()
+    Handler.codes, Handler.fail = [], False
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), functools.partial(Handler, directory=str(root)))
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield root, f"http://127.0.0.1:{httpd.server_address[1]}", httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def publish(path, data: bytes, age: float = 0):
+    """Grava `data` com mtime `age` segundos no passado (Last-Modified em segundos)."""
+    path.write_bytes(data)
+    t = time.time() - age
+    os.utime(path, (t, t))
+
+
+def test_download_revalidate_and_change(server, tmp_path):
+    root, base, _ = server
+    cache = m.DownloadCache(str(tmp_path / "cache"), max_bytes=1 << 20, timeout=5)
+    publish(root / "a.gpkg", b"v1" * 100, age=60)
+
+    first = cache.fetch(f"{base}/a.gpkg")
+    assert open(first, "rb").read() == b"v1" * 100
+    assert first.endswith(".gpkg") and Handler.codes == [200]
+
+    assert cache.fetch(f"{base}/a.gpkg") == first
+    assert Handler.codes == [200, 304]
+
+    publish(root / "a.gpkg", b"v2" * 100)
+    changed = cache.fetch(f"{base}/a.gpkg")
+    assert changed != first
+    assert open(changed, "rb").read() == b"v2" * 100
+    assert Handler.codes == [200, 304, 200]
+
+
+def test_eviction(server, tmp_path):
+    root, base, _ = server
+    cache = m.DownloadCache(str(tmp_path / "cache"), max_bytes=1500, timeout=5)
+    publish(root / "a.gpkg", b"a" * 1000, age=60)
+    publish(root / "b.gpkg", b"b" * 1000, age=60)
+
+    a = cache.fetch(f"{base}/a.gpkg")
+    b = cache.fetch(f"{base}/b.gpkg")
+    assert os.path.exists(b) and not os.path.exists(a)
+    assert os.listdir(cache.objects) == [os.path.basename(b)]
+
+
+def test_fallback_to_local_copy(server, tmp_path):
+    root, base, httpd = server
+    cache = m.DownloadCache(str(tmp_path / "cache"), max_bytes=1 << 20, timeout=5)
+    publish(root / "a.gpkg", b"v1" * 100, age=60)
+    first = cache.fetch(f"{base}/a.gpkg")
+
+    # erro HTTP (ex.: 5xx do GitHub): usa a última cópia
+    Handler.fail = True
+    assert cache.fetch(f"{base}/a.gpkg") == first
+    assert Handler.codes[-1] == 503
+
+    # sem servidor: idem
+    httpd.shutdown()
+    httpd.server_close()
+    assert cache.fetch(f"{base}/a.gpkg") == first
+
+    # sem cópia local, o erro aparece
+    with pytest.raises(OSError):
+        cache.fetch(f"{base}/b.gpkg")
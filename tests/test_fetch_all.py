@@ -0,0 +1,69 @@
+"""fetch_all()/RateLimiter: limite de concorrência e espaçamento entre inícios."""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import export_landuse_buildings as e
+
+INTERVAL = 0.05
+EPS = 1e-3
+
+
+class Recorder:
+    """Stub de requisição: anota o início e a concorrência máxima."""
+
+    def __init__(self, duration: float):
+        self.duration = duration
+        self.starts = []
+        self.active = self.peak = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, value, *args):
+        with self._lock:
+            self.starts.append(time.monotonic())
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(self.duration)
+        with self._lock:
+            self.active -= 1
+        return value
+
+    def gaps(self):
+        starts = sorted(self.starts)
+        return [b - a for a, b in zip(starts, starts[1:])]
+
+
+@pytest.mark.parametrize("slots", [1, 2, 3])
+def test_rate_limiter(slots):
+    limiter = e.RateLimiter(slots, INTERVAL)
+    request = Recorder(duration=4 * INTERVAL)
+
+    def call(i):
+        with limiter:
+            return request(i)
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        assert sorted(pool.map(call, range(8))) == list(range(8))
+    assert request.peak == slots
+    assert min(request.gaps()) >= INTERVAL - EPS
+
+
+def test_fetch_all(monkeypatch):
+    cities = [f"city {i}" for i in range(5)]
+    boundary = Recorder(duration=0.01)
+    features = Recorder(duration=4 * INTERVAL)
+    monkeypatch.setattr(e, "NOMINATIM_MIN_INTERVAL", INTERVAL)
+    monkeypatch.setattr(e, "OVERPASS_MIN_INTERVAL", INTERVAL)
+    monkeypatch.setattr(e, "fetch_boundary", lambda city: boundary(f"geom {city}"))
+    monkeypatch.setattr(e, "get_features", features)
+    monkeypatch.setattr(e, "split_layers", lambda geom: (f"landuse {geom}", f"buildings {geom}"))
+
+    got = dict(e.fetch_all(cities, slots=2))
+
+    assert got == {c: (f"landuse geom {c}", f"buildings geom {c}") for c in cities}
+    assert boundary.peak == 1
+    assert min(boundary.gaps()) >= INTERVAL - EPS
+    assert features.peak == 2
+    assert min(features.gaps()) >= INTERVAL - EPS
@@ -0,0 +1,84 @@
+"""export_layer() e merge_geoparquet() contra os CSVs de data/."""
+import json
+import os
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import pytest
+import shapely
+
+pq = pytest.importorskip("pyarrow.parquet")
+import export_landuse_buildings as e
+import landuse_common
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data")
+CITIES = ["vancouver_british_columbia_canada", "city_of_north_vancouver_british_columbia_canada"]
+
+
+def read_csv_layer(name: str, element: str = "way") -> gpd.GeoDataFrame:
+    """CSV de data/ (WKT) como GeoDataFrame, com element/id sintéticos."""
+    df = pd.read_csv(os.path.join(DATA_DIR, f"{name}.csv"))
+    gdf = gpd.GeoDataFrame(df.drop(columns="geometry"),
+                           geometry=shapely.from_wkt(df["geometry"]), crs=4326)
+    gdf.insert(0, "id", np.arange(len(gdf), dtype=np.int64))
+    gdf.insert(0, "element", element)
+    return gdf
+
+
+@pytest.fixture
+def out_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(e, "OUT_DIR", str(tmp_path))
+    return tmp_path
+
+
+@pytest.mark.parametrize("layer", ["landuse", "buildings"])
+def test_export_layer_roundtrip(layer, out_dir):
+    name = f"{layer}__{CITIES[1]}"
+    src = read_csv_layer(name)
+    e.export_layer(src, name)
+
+    got = gpd.read_parquet(out_dir / f"{name}.parquet")
+    assert got.crs.to_epsg() == 4326
+    assert list(got.columns) == list(src.columns)
+    assert len(got) == len(src)
+    # os CSVs já vêm com 6 casas: a grade de 1e-6 não move mais que isso
+    assert shapely.equals_exact(got.geometry.values, src.geometry.values, tolerance=1e-6).all()
+    attrs = [c for c in src.columns if c != "geometry"]
+    pd.testing.assert_frame_equal(got[attrs].astype(str), src[attrs].astype(str))
+
+
+def test_merge_geoparquet(out_dir, monkeypatch):
+    monkeypatch.setattr(landuse_common, "PARQUET_ROW_GROUP_SIZE", 1000)
+    parts = [read_csv_layer(f"landuse__{city}") for city in CITIES]
+    # a segunda cidade repete 10 feições da primeira e traz uma coluna a mais
+    parts[1] = pd.concat([parts[0].iloc[:10], parts[1].assign(id=parts[1]["id"] + len(parts[0]))],
+                         ignore_index=True)
+    parts[1]["note"] = "x"
+    paths = []
+    for city, gdf in zip(CITIES, parts):
+        e.to_geoparquet(gdf, str(out_dir / f"{city}.parquet"))
+        paths.append(str(out_dir / f"{city}.parquet"))
+    out = str(out_dir / "merged.parquet")
+
+    assert e.merge_geoparquet(paths, out) == 10
+
+    pf = pq.ParquetFile(out)
+    assert pf.schema_arrow.names == list(parts[0].columns) + ["bbox", "note"]
+    sizes = [pf.metadata.row_group(i).num_rows for i in range(pf.num_row_groups)]
+    assert pf.num_row_groups > 1 and max(sizes) <= 1000
+    assert sum(sizes) == len(parts[0]) + len(parts[1]) - 10
+
+    merged = gpd.read_parquet(out)
+    expected = pd.concat([parts[0], parts[1].iloc[10:]], ignore_index=True)
+    assert merged["id"].tolist() == expected["id"].tolist()
+    assert merged["note"].isna().sum() == len(parts[0])
+
+    geo = json.loads(pf.schema_arrow.metadata[b"geo"])["columns"]["geometry"]
+    np.testing.assert_allclose(geo["bbox"], expected.total_bounds)
+    assert set(geo["geometry_types"]) == set(expected.geom_type)
+    # bbox por linha (covering) confere com a geometria
+    bbox = pq.read_table(out, columns=["bbox"])["bbox"].to_pandas()
+    np.testing.assert_allclose(
+        np.array([[b["xmin"], b["ymin"], b["xmax"], b["ymax"]] for b in bbox]),
+        shapely.bounds(merged.geometry.values), atol=1e-6)
@@ -0,0 +1,41 @@
+"""render_tiles(): a pirâmide PNG é byte a byte a mesma entre execuções e com workers."""
+import os
+
+import geopandas as gpd
+import numpy as np
+import pytest
+
+import industrial_service_landuse_map as m
+
+GPKG = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data",
+                    "landuse__city_of_north_vancouver_british_columbia_canada.gpkg")
+
+
+def read_tree(root) -> dict:
+    out = {}
+    for dirpath, _, names in os.walk(root):
+        for name in names:
+            path = os.path.join(dirpath, name)
+            with open(path, "rb") as f:
+                out[os.path.relpath(path, root)] = f.read()
+    return out
+
+
+@pytest.fixture
+def layer(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # cache/simplify fica no diretório temporário
+    gdf = gpd.read_file(GPKG)
+    gdf = gdf[gdf.geom_type.isin(["Polygon", "MultiPolygon"])].reset_index(drop=True)
+    gdf["fill"] = np.array(m.FILLS, dtype=object)[np.arange(len(gdf)) % len(m.FILLS)]
+    return gdf
+
+
+def test_render_tiles_reproducible(layer, tmp_path):
+    runs = {}
+    for name, workers in (("serial", 1), ("again", 1), ("parallel", 2)):
+        count = m.render_tiles(layer, str(tmp_path / name), zooms=(10, 11), workers=workers)
+        runs[name] = read_tree(tmp_path / name)
+        assert count == len(runs[name]) > 0
+    assert all(path.endswith(".png") for path in runs["serial"])
+    assert runs["again"] == runs["serial"]
+    assert runs["parallel"] == runs["serial"]
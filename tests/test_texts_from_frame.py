@@ -0,0 +1,47 @@
+"""texts_from_frame() deve produzir, byte a byte, o texto de text_from_row()."""
+import os
+from glob import glob
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import pytest
+
+import industrial_service_landuse_map as m
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data")
+GPKGS = sorted(glob(os.path.join(DATA_DIR, "landuse__*.gpkg"))) + [
+    os.path.join(DATA_DIR, "buildings__city_of_north_vancouver_british_columbia_canada.gpkg"),
+]
+
+
+@pytest.fixture(params=["arrow", "numpy"])
+def engine(request, monkeypatch):
+    if request.param == "arrow":
+        if m.pa is None:
+            pytest.skip("pyarrow não instalado")
+    else:
+        monkeypatch.setattr(m, "pa", None)
+    return request.param
+
+
+def assert_same_text(frame: pd.DataFrame):
+    expected = [m.text_from_row(row) for _, row in frame.iterrows()]
+    got = m.texts_from_frame(frame)
+    assert got.index.equals(frame.index)
+    assert [t.encode("utf-8") for t in got.tolist()] == [t.encode("utf-8") for t in expected]
+
+
+@pytest.mark.parametrize("path", GPKGS, ids=os.path.basename)
+def test_bundled_gpkg(path, engine):
+    assert_same_text(gpd.read_file(path))
+
+
+def test_nulls_lists_and_non_ascii(engine):
+    frame = pd.DataFrame({
+        "landuse": ["Industrial", None, np.nan, "İSTANBUL ΟΔΟΣ", ""],
+        "name": [["Depot", None], [None, np.nan], None, "Straße", "x"],
+        "height": [1.5, np.nan, 3.0, np.nan, 0.0],
+        "geometry": [None] * 5,
+    }, index=[10, 11, 12, 13, 14])
+    assert_same_text(frame)